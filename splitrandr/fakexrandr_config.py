@@ -376,6 +376,18 @@ def disable_screensaver_lock():
              "cs-backup-locker black grab on split monitors)")
 
 
+def _atomic_write(path, data):
+    """Replace ``path`` with ``data`` (bytes) via a fsync'd ``.tmp``
+    sibling and rename, so concurrent readers only ever see the old or
+    the new complete file."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
 def write_fakexrandr_config(splits_dict, xrandr_state, xrandr_config, borders_dict=None):
     """Write ~/.config/fakexrandr.bin from the current split configuration.
 
@@ -406,12 +418,16 @@ def write_fakexrandr_config(splits_dict, xrandr_state, xrandr_config, borders_di
         width = output_cfg.size[0]
         height = output_cfg.size[1]
 
-        split_count = tree.count_leaves()
+        # Leaf count and primary leaf from one walk instead of
+        # count_leaves() + primary_leaf_index().
+        split_count = 0
+        primary_leaf = FAKEXRANDR_NO_PRIMARY_LEAF
+        for i, leaf in tree.iter_leaves():
+            split_count += 1
+            if leaf.primary and primary_leaf == FAKEXRANDR_NO_PRIMARY_LEAF:
+                primary_leaf = i
         tree_data = tree.to_fakexrandr_bytes(width, height)
         border = borders_dict.get(output_name, 0) if borders_dict else 0
-        primary_leaf = tree.primary_leaf_index()
-        if primary_leaf is None:
-            primary_leaf = FAKEXRANDR_NO_PRIMARY_LEAF
 
         # Pack the entry (without the leading length field). v2 layout:
         # name(128) edid(768) width(4) height(4) split_count(4) border(4)
@@ -462,15 +478,9 @@ def write_fakexrandr_config(splits_dict, xrandr_state, xrandr_config, borders_di
         # meta_display_logical_index_to_xinerama_index. Write to a
         # tmp file and rename so readers always see either the old
         # complete file or the new complete file, never a torn write.
-        tmp_path = CONFIG_PATH + '.tmp'
-        with open(tmp_path, 'wb') as f:
-            f.write(header)
-            for entry in entries:
-                f.write(entry)
-            f.flush()
-            os.fsync(f.fileno())
-        os.replace(tmp_path, CONFIG_PATH)
-        total = len(header) + sum(len(e) for e in entries)
+        payload = header + b''.join(entries)
+        _atomic_write(CONFIG_PATH, payload)
+        total = len(payload)
         log.info("wrote fakexrandr config: %s (%d entries, primary=%r, %d bytes)",
                  CONFIG_PATH, len(entries), primary_connector or None, total)
     else:
@@ -758,13 +768,13 @@ def write_cinnamon_monitors_xml(splits_dict, xrandr_state, xrandr_config, border
         disabled_count += 1
 
     _indent_xml(root)
-    tree_obj = ET.ElementTree(root)
     xml_path = compositor.current().monitors_xml_path
     config_dir = os.path.dirname(xml_path)
     os.makedirs(config_dir, exist_ok=True)
-    tmp_path = xml_path + '.tmp'
-    tree_obj.write(tmp_path, encoding='unicode', xml_declaration=False)
-    os.replace(tmp_path, xml_path)
+    # Same tmp+fsync+rename path as fakexrandr.bin: Cinnamon reads both
+    # on restart, so neither may be left torn or unsynced.
+    _atomic_write(xml_path,
+                  ET.tostring(root, encoding='unicode').encode('utf-8'))
     log.info("wrote %s (logical monitors=%d, disabled=%d)",
              xml_path, count, disabled_count)
 
@@ -1100,11 +1110,17 @@ def restart_cinnamon_with_fakexrandr(lib_path=None):
 
     log.info("restarting %s with LD_PRELOAD=%s FAKEXRANDR_LOG=%s",
              comp.shell_process, env['LD_PRELOAD'], env['FAKEXRANDR_LOG'])
-    subprocess.Popen(
-        comp.restart_argv, env=env,
-        start_new_session=True,
-        stdout=cinnamon_log, stderr=cinnamon_log,
-    )
+    try:
+        subprocess.Popen(
+            comp.restart_argv, env=env,
+            start_new_session=True,
+            stdout=cinnamon_log, stderr=cinnamon_log,
+        )
+    finally:
+        # The child has its own copy of the descriptor; ours would
+        # otherwise stay open until GC, one per restart.
+        if cinnamon_log is not subprocess.DEVNULL:
+            cinnamon_log.close()
     return True
 
 
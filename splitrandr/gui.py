@@ -18,7 +18,7 @@ the CLI entry points (``--apply``, ``--watch`` etc.) live in
 """
 
 import os
-import optparse
+import argparse
 import logging
 
 import gi
@@ -62,6 +62,10 @@ class Application(
         self._updating_controls = False
         # Which profile the Proposed pane reflects; None = live X state.
         self._shown_profile = None
+        # Layout dict as of the last save/load of _shown_profile.
+        self._shown_profile_data = None
+        # Coalesces profile popover + tray rebuilds (gui_app_profiles).
+        self._profile_refresh_pending = False
         # Status-InfoBar suppression flags (see gui_app_layout).
         self._apply_in_flight = False
         self._reload_in_flight = False
@@ -229,11 +233,14 @@ def main():
         format='%(name)s: %(message)s',
     )
 
-    parser = optparse.OptionParser(
+    parser = argparse.ArgumentParser(
         description="Monitor Layout Editor with Virtual Monitor Splitting",
-        version="%%prog %s" % __version__
     )
-    parser.add_option(
+    parser.add_argument(
+        '--version', action='version',
+        version="%%(prog)s %s" % __version__
+    )
+    parser.add_argument(
         '--randr-display',
         help=(
             'Use D as display for xrandr '
@@ -242,33 +249,37 @@ def main():
         ),
         metavar='D'
     )
-    parser.add_option(
+    parser.add_argument(
         '--force-version',
         help='Even run with untested XRandR versions',
         action='store_true'
     )
-    parser.add_option(
+    parser.add_argument(
         '--apply',
         help='Apply layout from JSON config (default: ~/.config/splitrandr/layout.json), then exit',
         action='store_true'
     )
-    parser.add_option(
+    parser.add_argument(
         '--regenerate',
         help='Regenerate autostart config and active profile from current X state, then exit',
         action='store_true'
     )
-    parser.add_option(
+    parser.add_argument(
         '--update-configs',
         help="Write fakexrandr.bin and the compositor's monitors.xml from current X state, then exit",
         action='store_true'
     )
-    parser.add_option(
+    parser.add_argument(
         '--watch',
         help='Run headless, re-applying active profile on screen unlock or wake from suspend',
         action='store_true'
     )
+    parser.add_argument(
+        'file', nargs='?',
+        help='JSON config to use with --apply'
+    )
 
-    (options, args) = parser.parse_args()
+    options = parser.parse_args()
 
     # Block any second splitrandr in this session. Two instances racing
     # on ~/.config/fakexrandr.bin is what kicked off the crash chain on
@@ -294,7 +305,7 @@ def main():
         return
 
     if options.apply:
-        json_path = args[0] if args else Application.LAYOUT_JSON
+        json_path = options.file or Application.LAYOUT_JSON
         _apply_config(json_path)
         return
 
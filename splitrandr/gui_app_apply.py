@@ -23,7 +23,9 @@ LD_PRELOAD wrapper and verifies the freshly loaded version.
 """
 
 import os
+import signal
 import subprocess
+import time
 import logging
 
 import gi
@@ -99,6 +101,28 @@ def _safe_to_save_profile(xrandr):
 log = logging.getLogger('splitrandr')
 
 
+def _run_shell_script(script, timeout):
+    """Run ``script`` with /bin/sh and wait up to ``timeout`` seconds.
+
+    Spawned with os.posix_spawn rather than subprocess.run: the revert
+    needs no pipes or fd juggling, so the Popen machinery buys nothing.
+    Mirrors subprocess.run's timeout contract — the child is killed and
+    subprocess.TimeoutExpired raised.
+    """
+    argv = ['sh', '-c', script]
+    pid = os.posix_spawn('/bin/sh', argv, os.environ)
+    deadline = time.monotonic() + timeout
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            return os.waitstatus_to_exitcode(status)
+        if time.monotonic() >= deadline:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            raise subprocess.TimeoutExpired(argv, timeout)
+        time.sleep(0.05)
+
+
 class ApplicationApplyMixin:
 
     def _reload_cinnamon_ui(self):
@@ -265,7 +289,11 @@ class ApplicationApplyMixin:
                 os.remove(CONFIG_PATH)
             except FileNotFoundError:
                 pass
-            subprocess.run(['sh', '-c', revert_script], timeout=30)
+            _run_shell_script(revert_script, timeout=30)
+            # The script changed X behind _run's back; don't reload
+            # the pre-revert layout from the query cache.
+            from .xrandr_invoke import invalidate_query_cache
+            invalidate_query_cache()
             self.widget.load_from_x()
             # Restore fakexrandr config if splits are active
             try:
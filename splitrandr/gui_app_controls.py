@@ -336,7 +336,7 @@ class ApplicationControlsMixin:
 
     def _on_detect_displays(self):
         self.current_widget.load_from_cinnamon()
-        self.widget.load_from_x()
+        self.widget.load_from_x(probe=True)
 
     def _on_reset_defaults(self):
         self.widget.load_from_x()
@@ -14,10 +14,11 @@ The profile popover UI itself is built in ``gui_app_layout``
 """
 
 import os
+from functools import lru_cache
 
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
+from gi.repository import Gtk, GLib
 
 from . import profiles
 from .i18n import _
@@ -26,6 +27,17 @@ from .meta import (
 )
 
 
+_TRANSLATOR_CREDITS = "\n".join(TRANSLATORS) if TRANSLATORS else ""
+
+
+@lru_cache(maxsize=None)
+def _license_text():
+    """GPL text for the About dialog, read and escaped on first use."""
+    with open(os.path.join(os.path.dirname(__file__),
+                           'data', 'gpl-3.txt')) as f:
+        return f.read().replace('<', u'〈 ').replace('>', u' 〉')
+
+
 class ApplicationProfilesMixin:
 
     #################### profiles & tray ####################
@@ -59,23 +71,32 @@ class ApplicationProfilesMixin:
         if dialog.run() == Gtk.ResponseType.ACCEPT:
             name = entry.get_text().strip()
             if name:
-                profiles.save_profile(name,
-                                      self.widget._xrandr.configuration.to_dict())
+                data = self.widget._xrandr.configuration.to_dict()
+                profiles.save_profile(name, data)
                 profiles.set_active_profile(name)
                 self._shown_profile = name
-                self._refresh_profile_ui()
-                self._notify_tray()
+                self._shown_profile_data = data
+                self._schedule_profile_refresh()
         dialog.destroy()
 
     def _do_load_profile(self, name):
+        # Already showing this profile, unedited: skip the JSON parse
+        # and the canvas reload.
+        if (name == self._shown_profile
+                and name == profiles.get_active_profile()
+                and self._shown_profile_data
+                == self.widget._xrandr.configuration.to_dict()):
+            return
         path = profiles.profile_path(name)
-        if os.path.exists(path):
+        try:
             self.widget._xrandr.load_from_json(path)
-            self.widget._xrandr_was_reloaded()
-            profiles.set_active_profile(name)
-            self._shown_profile = name
-            self._refresh_profile_ui()
-            self._notify_tray()
+        except FileNotFoundError:
+            return
+        self.widget._xrandr_was_reloaded()
+        profiles.set_active_profile(name)
+        self._shown_profile = name
+        self._shown_profile_data = self.widget._xrandr.configuration.to_dict()
+        self._schedule_profile_refresh()
 
     def _do_delete_profile(self, name):
         dialog = Gtk.MessageDialog(
@@ -87,8 +108,8 @@ class ApplicationProfilesMixin:
             profiles.delete_profile(name)
             if self._shown_profile == name:
                 self._shown_profile = None
-            self._refresh_profile_ui()
-            self._notify_tray()
+                self._shown_profile_data = None
+            self._schedule_profile_refresh()
         dialog.destroy()
 
     def _start_tray(self):
@@ -115,6 +136,20 @@ class ApplicationProfilesMixin:
         if self._tray:
             self._tray.refresh_menu()
 
+    def _schedule_profile_refresh(self):
+        """Rebuild the profile popover and tray menu from an idle
+        callback, so back-to-back profile changes pay for one rebuild."""
+        if self._profile_refresh_pending:
+            return
+        self._profile_refresh_pending = True
+        GLib.idle_add(self._do_profile_refresh)
+
+    def _do_profile_refresh(self):
+        self._profile_refresh_pending = False
+        self._refresh_profile_ui()
+        self._notify_tray()
+        return False  # one-shot idle callback
+
     #################### window management ####################
 
     def _on_delete_event(self, _window, _event):
@@ -158,15 +193,12 @@ class ApplicationProfilesMixin:
         dialog.set_transient_for(self.window)
         dialog.props.program_name = PROGRAMNAME
         dialog.props.version = __version__
-        dialog.props.translator_credits = "\n".join(TRANSLATORS) if TRANSLATORS else ""
+        dialog.props.translator_credits = _TRANSLATOR_CREDITS
         dialog.props.copyright = COPYRIGHT
         dialog.props.comments = "%s\n\n%s" % (
             PROGRAMDESCRIPTION, self._fxr_version_line())
         dialog.props.logo_icon_name = 'video-display'
-        licensetext = open(os.path.join(os.path.dirname(
-            __file__), 'data', 'gpl-3.txt')).read()
-        dialog.props.license = licensetext.replace(
-            '<', u'〈 ').replace('>', u' 〉')
+        dialog.props.license = _license_text()
         dialog.run()
         dialog.destroy()
 
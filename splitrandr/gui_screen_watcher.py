@@ -11,6 +11,7 @@ suspend/wake, and display hotplug events.
 """
 
 import os
+import re
 import logging
 
 import gi
@@ -22,6 +23,11 @@ from . import profiles
 
 _sw_log = logging.getLogger('splitrandr.screenwatcher')
 
+# `xrandr --query` output geometry (WxH+X+Y) and `--listmonitors`
+# monitor geometry (W/mmWxH/mmH+X+Y).
+_GEOMETRY_RE = re.compile(r'(\d+)x(\d+)\+(\d+)\+(\d+)')
+_MONITOR_GEOMETRY_RE = re.compile(r'(\d+)/\d+x(\d+)/\d+\+(\d+)\+(\d+)')
+
 
 class ScreenWatcher:
     """Watch for screen unlock and system wake events, re-apply layout.
@@ -130,6 +136,9 @@ class ScreenWatcher:
         # debounced re-apply below re-establishes the split once the
         # monitor set stops flapping.
         self._teardown_splits_now()
+        # Both the hotplug and the teardown's delmonitors changed X.
+        from .xrandr_invoke import invalidate_query_cache
+        invalidate_query_cache()
         self._schedule_reapply()
 
     def _teardown_splits_now(self):
@@ -276,7 +285,7 @@ class ScreenWatcher:
         RandR emits no event for their absence (see
         nudge_gtk_monitor_refresh in fakexrandr_config).
         """
-        import json, re, subprocess
+        import json, subprocess
         try:
             path = profiles.profile_path(profile_name)
             with open(path) as f:
@@ -311,7 +320,7 @@ class ScreenWatcher:
                 parts = line.split()
                 if len(parts) < 3 or not parts[0].rstrip(':').isdigit():
                     continue
-                m = re.match(r'(\d+)/\d+x(\d+)/\d+\+(\d+)\+(\d+)', parts[2])
+                m = _MONITOR_GEOMETRY_RE.match(parts[2])
                 if m:
                     current_vms[parts[1].lstrip('+*')] = (
                         int(m.group(1)), int(m.group(2)),
@@ -332,7 +341,7 @@ class ScreenWatcher:
             if 'primary' in parts:
                 current_primary = name
             for p in parts[2:]:
-                m = re.match(r'(\d+)x(\d+)\+(\d+)\+(\d+)', p)
+                m = _GEOMETRY_RE.match(p)
                 if m:
                     current[name] = (
                         int(m.group(1)), int(m.group(2)),
@@ -8,28 +8,56 @@
 
 """Profile and settings management for SplitRandR (no GTK dependency)."""
 
-import configparser
-import json
 import os
 
 CONFIG_DIR = os.path.expanduser('~/.config/splitrandr')
 CONFIG_FILE = os.path.join(CONFIG_DIR, 'config')
 ACTIVE_FILE = os.path.join(CONFIG_DIR, 'active')
 PROFILES_DIR = os.path.join(CONFIG_DIR, 'profiles')
+PROFILES_CACHE = os.path.join(CONFIG_DIR, 'profiles.cache')
+
+# Set once CONFIG_DIR is known to exist, so repeat writes skip makedirs.
+_config_dir_exists = False
+
+# Last list written to PROFILES_CACHE by this process.
+_listed_profiles = None
+# (PROFILES_DIR mtime_ns, names) from the last directory scan.
+_listing_cache = (None, ())
+
+
+def _ensure_config_dir():
+    global _config_dir_exists
+    if not _config_dir_exists:
+        os.makedirs(CONFIG_DIR, exist_ok=True)
+        _config_dir_exists = True
+
+
+def _write_small_file(path, text):
+    """Write a short text file with one unbuffered write."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, text.encode('utf-8'))
+    finally:
+        os.close(fd)
 
 
 # ── Settings ──────────────────────────────────────────────────────────
 
 def _read_config():
+    # Deferred: the tray and --watch paths import this module for the
+    # profile helpers only and never touch settings.
+    import configparser
     cfg = configparser.ConfigParser()
     cfg.read(CONFIG_FILE)
     return cfg
 
 
 def _write_config(cfg):
-    os.makedirs(CONFIG_DIR, exist_ok=True)
-    with open(CONFIG_FILE, 'w') as f:
-        cfg.write(f)
+    import io
+    _ensure_config_dir()
+    buf = io.StringIO()
+    cfg.write(buf)
+    _write_small_file(CONFIG_FILE, buf.getvalue())
 
 
 def get_setting(key, default=None):
@@ -52,58 +80,121 @@ def is_first_run():
 # ── Profiles ──────────────────────────────────────────────────────────
 
 def list_profiles():
-    if not os.path.isdir(PROFILES_DIR):
-        return []
-    names = []
-    for f in os.listdir(PROFILES_DIR):
-        if f.endswith('.json'):
-            names.append(f[:-5])
-    return sorted(names)
+    global _listed_profiles, _listing_cache
+    # Adding, removing or renaming a profile bumps the directory's
+    # mtime, so one stat decides whether the listing can be reused.
+    try:
+        key = os.stat(PROFILES_DIR).st_mtime_ns
+    except FileNotFoundError:
+        names = []
+    else:
+        if key == _listing_cache[0]:
+            return list(_listing_cache[1])
+        names = sorted(f[:-5] for f in os.listdir(PROFILES_DIR)
+                       if f.endswith('.json'))
+        _listing_cache = (key, tuple(names))
+    if names != _listed_profiles:
+        try:
+            _ensure_config_dir()
+            _write_small_file(PROFILES_CACHE, ''.join(n + '\n' for n in names))
+        except OSError:
+            pass
+        _listed_profiles = names
+    return names
+
+
+def cached_profile_list():
+    """Profile names as of the last list_profiles() in any process.
+
+    Returns None when there is no cache yet. May be stale; callers show
+    it immediately and revalidate with list_profiles().
+    """
+    try:
+        with open(PROFILES_CACHE) as f:
+            return f.read().splitlines()
+    except OSError:
+        return None
 
 
 def profile_path(name):
-    path = os.path.join(PROFILES_DIR, name + '.json')
+    # PROFILES_DIR never ends in a separator and this is POSIX-only, so
+    # a plain f-string is equivalent to os.path.join here.
+    path = f"{PROFILES_DIR}/{name}.json"
     if os.path.commonpath([PROFILES_DIR, os.path.normpath(path)]) != PROFILES_DIR:
         raise ValueError("invalid profile name: %r" % name)
     return path
 
 
 def save_profile(name, config_dict):
+    import json
     os.makedirs(PROFILES_DIR, exist_ok=True)
     path = profile_path(name)
+    # Serialise up front so the file is written in one call; json.dump
+    # with indent= emits one small write() per token.
+    data = json.dumps(config_dict, indent=2) + '\n'
     with open(path, 'w') as f:
-        json.dump(config_dict, f, indent=2)
-        f.write('\n')
+        f.write(data)
 
 
 def delete_profile(name):
     path = profile_path(name)
-    if os.path.exists(path):
+    try:
         os.remove(path)
+    except FileNotFoundError:
+        pass
     if get_active_profile() == name:
         set_active_profile('')
 
 
+# (st_mtime_ns, st_size) of ACTIVE_FILE when last read, and its value.
+# The watcher and the GUI both write the file, so the key is re-checked
+# with a stat on every call rather than trusted across processes.
+_active_cache = (None, '')
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
 def get_active_profile():
+    global _active_cache
     try:
+        key = _stat_key(ACTIVE_FILE)
+        if key == _active_cache[0]:
+            return _active_cache[1]
         with open(ACTIVE_FILE, 'r') as f:
-            return f.read().strip()
+            value = f.read().strip()
     except FileNotFoundError:
         return ''
+    _active_cache = (key, value)
+    return value
 
 
 def set_active_profile(name):
-    os.makedirs(CONFIG_DIR, exist_ok=True)
-    with open(ACTIVE_FILE, 'w') as f:
-        f.write(name + '\n')
+    global _active_cache
+    _ensure_config_dir()
+    _write_small_file(ACTIVE_FILE, name + '\n')
+    try:
+        _active_cache = (_stat_key(ACTIVE_FILE), name)
+    except FileNotFoundError:
+        _active_cache = (None, '')
 
 
 def apply_profile(name):
-    path = profile_path(name)
-    if os.path.exists(path):
-        from .xrandr import XRandR
-        xrandr = XRandR(force_version=True)
-        xrandr.load_from_x()
-        xrandr.load_from_json(path)
-        xrandr.save_to_x()
-        set_active_profile(name)
+    """Apply a saved profile; returns False if it no longer exists."""
+    # Read the profile before touching X, so a missing one costs a
+    # failed open() rather than a round of xrandr queries.
+    import json
+    try:
+        with open(profile_path(name), 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return False
+    from .xrandr import XRandR
+    xrandr = XRandR(force_version=True)
+    xrandr.load_from_x()
+    xrandr.load_from_dict(data)
+    xrandr.save_to_x()
+    set_active_profile(name)
+    return True
@@ -12,12 +12,15 @@ import struct
 
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk, Gdk
+from gi.repository import Gtk, Gdk, GLib
 
-SPLIT_COLORS = [
+# Native-order uint32, matching the struct the fakexrandr shim reads.
+_pack_u32 = struct.Struct('I').pack
+
+SPLIT_COLORS = tuple(
     (int(x[:2], 16) / 255., int(x[2:4], 16) / 255., int(x[4:], 16) / 255.)
     for x in "5e412f fcebb6 78c0a8 f07818 f0a830 b1eb00 53bbf4 ff85cb ff432e ffac00".split()
-]
+)
 
 
 class SplitTree:
@@ -27,12 +30,18 @@ class SplitTree:
     where direction is 'H' or 'V', proportion is 0.0-1.0, and left/right are SplitTree.
     """
 
+    __slots__ = ('direction', 'proportion', 'left', 'right', 'primary',
+                 '_fxr_cache', '_leaf_count', '_prop_leaves')
+
     def __init__(self, direction=None, proportion=0.5, left=None, right=None):
         self.direction = direction  # 'H' or 'V' or None (leaf)
         self.proportion = proportion
         self.left = left or SplitTree.__new_leaf()
         self.right = right or SplitTree.__new_leaf()
         self.primary = False  # only meaningful for leaves
+        self._fxr_cache = None  # ((width, height), bytes); see invalidate_cache
+        self._leaf_count = None
+        self._prop_leaves = None
 
     @staticmethod
     def __new_leaf():
@@ -42,6 +51,9 @@ class SplitTree:
         t.left = None
         t.right = None
         t.primary = False
+        t._fxr_cache = None
+        t._leaf_count = None
+        t._prop_leaves = None
         return t
 
     @staticmethod
@@ -54,61 +66,79 @@ class SplitTree:
 
     def leaf_regions(self, width, height, x=0, y=0, w_mm=0, h_mm=0):
         """Enumerate sub-monitor rectangles as (x, y, w, h, w_mm, h_mm) tuples."""
-        if self.is_leaf:
-            yield (x, y, width, height, w_mm, h_mm)
-            return
-
-        if self.direction == 'V':
-            left_w = int(round(width * self.proportion))
-            right_w = width - left_w
-            left_mm = int(round(w_mm * self.proportion)) if w_mm else 0
-            right_mm = w_mm - left_mm if w_mm else 0
-            yield from self.left.leaf_regions(left_w, height, x, y, left_mm, h_mm)
-            yield from self.right.leaf_regions(right_w, height, x + left_w, y, right_mm, h_mm)
-        else:  # 'H'
-            top_h = int(round(height * self.proportion))
-            bottom_h = height - top_h
-            top_mm = int(round(h_mm * self.proportion)) if h_mm else 0
-            bottom_mm = h_mm - top_mm if h_mm else 0
-            yield from self.left.leaf_regions(width, top_h, x, y, w_mm, top_mm)
-            yield from self.right.leaf_regions(width, bottom_h, x, y + top_h, w_mm, bottom_mm)
+        # Explicit stack instead of recursive generators; the right child
+        # is pushed first so leaves still come out left-to-right.
+        stack = [(self, x, y, width, height, w_mm, h_mm)]
+        while stack:
+            node, x, y, width, height, w_mm, h_mm = stack.pop()
+            if node.direction is None:
+                yield (x, y, width, height, w_mm, h_mm)
+                continue
+
+            # round() of a float already returns an int; the int()
+            # wrapper was a second call per split for nothing.
+            p = node.proportion
+            if node.direction == 'V':
+                left_w = round(width * p)
+                left_mm = round(w_mm * p) if w_mm else 0
+                right_mm = w_mm - left_mm if w_mm else 0
+                stack.append((node.right, x + left_w, y, width - left_w, height,
+                              right_mm, h_mm))
+                stack.append((node.left, x, y, left_w, height, left_mm, h_mm))
+            else:  # 'H'
+                top_h = round(height * p)
+                top_mm = round(h_mm * p) if h_mm else 0
+                bottom_mm = h_mm - top_mm if h_mm else 0
+                stack.append((node.right, x, y + top_h, width, height - top_h,
+                              w_mm, bottom_mm))
+                stack.append((node.left, x, y, width, top_h, w_mm, top_mm))
 
     def leaf_regions_proportional(self, x=0.0, y=0.0, w=1.0, h=1.0):
         """Enumerate sub-regions as proportional (x, y, w, h) tuples in 0.0-1.0 space."""
-        if self.is_leaf:
-            yield (x, y, w, h)
-            return
+        stack = [(self, x, y, w, h)]
+        while stack:
+            node, x, y, w, h = stack.pop()
+            if node.direction is None:
+                yield (x, y, w, h)
+                continue
 
-        if self.direction == 'V':
-            left_w = w * self.proportion
-            right_w = w - left_w
-            yield from self.left.leaf_regions_proportional(x, y, left_w, h)
-            yield from self.right.leaf_regions_proportional(x + left_w, y, right_w, h)
-        else:
-            top_h = h * self.proportion
-            bottom_h = h - top_h
-            yield from self.left.leaf_regions_proportional(x, y, w, top_h)
-            yield from self.right.leaf_regions_proportional(x, y + top_h, w, bottom_h)
+            if node.direction == 'V':
+                left_w = w * node.proportion
+                stack.append((node.right, x + left_w, y, w - left_w, h))
+                stack.append((node.left, x, y, left_w, h))
+            else:
+                top_h = h * node.proportion
+                stack.append((node.right, x, y + top_h, w, h - top_h))
+                stack.append((node.left, x, y, w, top_h))
+
+    def proportional_leaves(self):
+        """Return ((x, y, w, h), leaf) pairs for every leaf in 0.0-1.0
+        space, cached on the node called on until invalidate_cache()."""
+        cached = self._prop_leaves
+        if cached is None:
+            cached = self._prop_leaves = tuple(zip(
+                self.leaf_regions_proportional(),
+                (leaf for _, leaf in self.iter_leaves())))
+        return cached
 
     def get_split_for_point(self, px, py, x=0.0, y=0.0, w=1.0, h=1.0):
         """Hit-test: return the (tree_node, x, y, w, h) for the leaf containing (px, py)."""
-        if self.is_leaf:
-            return (self, x, y, w, h)
-
-        if self.direction == 'V':
-            split_x = x + w * self.proportion
-            if px < split_x:
-                return self.left.get_split_for_point(px, py, x, y, w * self.proportion, h)
-            else:
-                return self.right.get_split_for_point(
-                    px, py, split_x, y, w * (1 - self.proportion), h)
-        else:
-            split_y = y + h * self.proportion
-            if py < split_y:
-                return self.left.get_split_for_point(px, py, x, y, w, h * self.proportion)
+        node = self
+        while node.direction is not None:
+            p = node.proportion
+            if node.direction == 'V':
+                split_x = x + w * p
+                if px < split_x:
+                    node, w = node.left, w * p
+                else:
+                    node, x, w = node.right, split_x, w * (1 - p)
             else:
-                return self.right.get_split_for_point(
-                    px, py, x, split_y, w, h * (1 - self.proportion))
+                split_y = y + h * p
+                if py < split_y:
+                    node, h = node.left, h * p
+                else:
+                    node, y, h = node.right, split_y, h * (1 - p)
+        return (node, x, y, w, h)
 
     def find_nearest_edge(self, px, py, x=0.0, y=0.0, w=1.0, h=1.0,
                           threshold_px=8, canvas_w=1.0, canvas_h=1.0):
@@ -116,57 +146,58 @@ class SplitTree:
         Distance is measured in pixels (using canvas_w/canvas_h to scale)
         so the grab radius is uniform regardless of the canvas aspect ratio.
         Returns (node, parent, is_left_child, distance_px) or None."""
-        results = []
-        self._collect_edges(
-            px, py, x, y, w, h, canvas_w, canvas_h, None, True, results)
-        if not results:
-            return None
-        results.sort(key=lambda r: r[3])
-        if results[0][3] < threshold_px:
-            return results[0]
-        return None
+        best = None
+        best_dist = threshold_px
+        # Pre-order walk (node, then left, then right); strict < keeps
+        # the first edge on ties.
+        stack = [(self, x, y, w, h, None, True)]
+        while stack:
+            node, x, y, w, h, parent, is_left = stack.pop()
+            if node.direction is None:
+                continue
 
-    def _collect_edges(self, px, py, x, y, w, h, cw, ch, parent, is_left, results):
-        if self.is_leaf:
-            return
-
-        if self.direction == 'V':
-            edge_x = x + w * self.proportion
-            if y <= py <= y + h:
-                dist = abs(px - edge_x) * cw
-                results.append((self, parent, is_left, dist))
-            self.left._collect_edges(
-                px, py, x, y, w * self.proportion, h, cw, ch, self, True, results)
-            self.right._collect_edges(
-                px, py, edge_x, y, w * (1 - self.proportion), h, cw, ch,
-                self, False, results)
-        else:
-            edge_y = y + h * self.proportion
-            if x <= px <= x + w:
-                dist = abs(py - edge_y) * ch
-                results.append((self, parent, is_left, dist))
-            self.left._collect_edges(
-                px, py, x, y, w, h * self.proportion, cw, ch, self, True, results)
-            self.right._collect_edges(
-                px, py, x, edge_y, w, h * (1 - self.proportion), cw, ch,
-                self, False, results)
+            if node.direction == 'V':
+                edge_x = x + w * node.proportion
+                if y <= py <= y + h:
+                    dist = abs(px - edge_x) * canvas_w
+                    if dist < best_dist:
+                        best_dist = dist
+                        best = (node, parent, is_left, dist)
+                stack.append((node.right, edge_x, y,
+                              w * (1 - node.proportion), h, node, False))
+                stack.append((node.left, x, y,
+                              w * node.proportion, h, node, True))
+            else:
+                edge_y = y + h * node.proportion
+                if x <= px <= x + w:
+                    dist = abs(py - edge_y) * canvas_h
+                    if dist < best_dist:
+                        best_dist = dist
+                        best = (node, parent, is_left, dist)
+                stack.append((node.right, x, edge_y,
+                              w, h * (1 - node.proportion), node, False))
+                stack.append((node.left, x, y,
+                              w, h * node.proportion, node, True))
+        return best
 
     def find_node_region(self, target, x=0.0, y=0.0, w=1.0, h=1.0):
         """Return the proportional (x, y, w, h) region of a target node, or None."""
-        if self is target:
-            return (x, y, w, h)
-        if self.is_leaf:
-            return None
-        if self.direction == 'V':
-            left_w = w * self.proportion
-            return (self.left.find_node_region(target, x, y, left_w, h)
-                    or self.right.find_node_region(
-                        target, x + left_w, y, w - left_w, h))
-        else:
-            top_h = h * self.proportion
-            return (self.left.find_node_region(target, x, y, w, top_h)
-                    or self.right.find_node_region(
-                        target, x, y + top_h, w, h - top_h))
+        stack = [(self, x, y, w, h)]
+        while stack:
+            node, x, y, w, h = stack.pop()
+            if node is target:
+                return (x, y, w, h)
+            if node.direction is None:
+                continue
+            if node.direction == 'V':
+                left_w = w * node.proportion
+                stack.append((node.right, x + left_w, y, w - left_w, h))
+                stack.append((node.left, x, y, left_w, h))
+            else:
+                top_h = h * node.proportion
+                stack.append((node.right, x, y + top_h, w, h - top_h))
+                stack.append((node.left, x, y, w, top_h))
+        return None
 
     def to_setmonitor_commands(self, output_name, width, height, x_off, y_off, w_mm, h_mm, border=0):
         """Generate xrandr --setmonitor argument lists.
@@ -175,7 +206,7 @@ class SplitTree:
         If border > 0, each region is inset by that many pixels to create
         mouse dead zones between adjacent virtual monitors.
         """
-        regions = list(self.leaf_regions(width, height, x_off, y_off, w_mm, h_mm))
+        regions = self.leaf_regions(width, height, x_off, y_off, w_mm, h_mm)
         commands = []
         for i, (rx, ry, rw, rh, rmm_w, rmm_h) in enumerate(regions):
             if border > 0:
@@ -183,16 +214,47 @@ class SplitTree:
                 ry += border
                 rw = max(rw - 2 * border, 1)
                 rh = max(rh - 2 * border, 1)
-            mon_name = "%s~%d" % (output_name, i)
-            geom = "%d/%dx%d/%d+%d+%d" % (rw, rmm_w, rh, rmm_h, rx, ry)
-            out = output_name if i == 0 else "none"
-            commands.append((mon_name, geom, out))
+            # Every field is an int here (pixel sizes, offsets and mm are
+            # ints, and leaf_regions splits them with round()).
+            commands.append((
+                f"{output_name}~{i}",
+                f"{rw}/{rmm_w}x{rh}/{rmm_h}+{rx}+{ry}",
+                output_name if i == 0 else "none",
+            ))
         return commands
 
     def count_leaves(self):
-        if self.is_leaf:
-            return 1
-        return self.left.count_leaves() + self.right.count_leaves()
+        """Number of leaves, cached like to_fakexrandr_bytes (cleared by
+        invalidate_cache())."""
+        count = self._leaf_count
+        if count is None:
+            count = 0
+            stack = [self]
+            while stack:
+                node = stack.pop()
+                if node.direction is None:
+                    count += 1
+                else:
+                    stack.append(node.right)
+                    stack.append(node.left)
+            self._leaf_count = count
+        return count
+
+    @staticmethod
+    def _find_cut(regions, axis):
+        """Sweep regions sorted along axis (0 = x, 1 = y) for the lowest
+        coordinate that separates them into two non-empty groups.
+        Returns (cut, before, after) or None."""
+        ordered = sorted(regions, key=lambda r: r[axis])
+        far_edge = None
+        for i in range(1, len(ordered)):
+            prev = ordered[i - 1]
+            edge = prev[axis] + prev[axis + 2]
+            if far_edge is None or edge > far_edge:
+                far_edge = edge
+            if far_edge <= ordered[i][axis]:
+                return far_edge, ordered[:i], ordered[i:]
+        return None
 
     @staticmethod
     def from_setmonitor_regions(regions, output_name, total_w, total_h):
@@ -204,36 +266,30 @@ class SplitTree:
             return SplitTree.new_leaf()
 
         # Try vertical split: find an x coordinate that divides regions
-        xs = sorted(set(r[0] for r in regions) | set(r[0] + r[2] for r in regions))
-        for split_x in xs:
-            left_r = [r for r in regions if r[0] + r[2] <= split_x]
-            right_r = [r for r in regions if r[0] >= split_x]
-            if left_r and right_r and len(left_r) + len(right_r) == len(regions):
-                prop = split_x / total_w if total_w else 0.5
-                left_tree = SplitTree.from_setmonitor_regions(
-                    left_r, output_name, split_x, total_h)
-                right_w = total_w - split_x
-                right_tree = SplitTree.from_setmonitor_regions(
-                    [(r[0] - split_x, r[1], r[2], r[3]) for r in right_r],
-                    output_name, right_w, total_h)
-                tree = SplitTree('V', prop, left_tree, right_tree)
-                return tree
+        cut = SplitTree._find_cut(regions, 0)
+        if cut:
+            split_x, left_r, right_r = cut
+            prop = split_x / total_w if total_w else 0.5
+            left_tree = SplitTree.from_setmonitor_regions(
+                left_r, output_name, split_x, total_h)
+            right_w = total_w - split_x
+            right_tree = SplitTree.from_setmonitor_regions(
+                [(r[0] - split_x, r[1], r[2], r[3]) for r in right_r],
+                output_name, right_w, total_h)
+            return SplitTree('V', prop, left_tree, right_tree)
 
         # Try horizontal split
-        ys = sorted(set(r[1] for r in regions) | set(r[1] + r[3] for r in regions))
-        for split_y in ys:
-            top_r = [r for r in regions if r[1] + r[3] <= split_y]
-            bottom_r = [r for r in regions if r[1] >= split_y]
-            if top_r and bottom_r and len(top_r) + len(bottom_r) == len(regions):
-                prop = split_y / total_h if total_h else 0.5
-                top_tree = SplitTree.from_setmonitor_regions(
-                    top_r, output_name, total_w, split_y)
-                bottom_h = total_h - split_y
-                bottom_tree = SplitTree.from_setmonitor_regions(
-                    [(r[0], r[1] - split_y, r[2], r[3]) for r in bottom_r],
-                    output_name, total_w, bottom_h)
-                tree = SplitTree('H', prop, top_tree, bottom_tree)
-                return tree
+        cut = SplitTree._find_cut(regions, 1)
+        if cut:
+            split_y, top_r, bottom_r = cut
+            prop = split_y / total_h if total_h else 0.5
+            top_tree = SplitTree.from_setmonitor_regions(
+                top_r, output_name, total_w, split_y)
+            bottom_h = total_h - split_y
+            bottom_tree = SplitTree.from_setmonitor_regions(
+                [(r[0], r[1] - split_y, r[2], r[3]) for r in bottom_r],
+                output_name, total_w, bottom_h)
+            return SplitTree('H', prop, top_tree, bottom_tree)
 
         return SplitTree.new_leaf()
 
@@ -243,19 +299,47 @@ class SplitTree:
         Format: 'N' for leaf, or ('H'|'V') + 4-byte uint split position + left + right.
         H = horizontal line (top/bottom), position = pixels from top.
         V = vertical line (left/right), position = pixels from left.
+
+        The result is cached per (width, height) on the node this is
+        called on; call invalidate_cache() on it after mutating the tree.
         """
-        if self.is_leaf:
-            return b'N'
-        if self.direction == 'H':
-            pos = int(round(height * self.proportion))
-            return (b'H' + struct.pack('I', pos) +
-                    self.left.to_fakexrandr_bytes(width, pos) +
-                    self.right.to_fakexrandr_bytes(width, height - pos))
-        else:  # 'V'
-            pos = int(round(width * self.proportion))
-            return (b'V' + struct.pack('I', pos) +
-                    self.left.to_fakexrandr_bytes(pos, height) +
-                    self.right.to_fakexrandr_bytes(width - pos, height))
+        key = (width, height)
+        cache = self._fxr_cache
+        if cache is not None and cache[0] == key:
+            return cache[1]
+        data = self._fakexrandr_bytes(width, height)
+        self._fxr_cache = (key, data)
+        return data
+
+    def _fakexrandr_bytes(self, width, height):
+        # Pre-order walk appending into one buffer, rather than
+        # concatenating a new bytes object at every level.
+        buf = bytearray()
+        stack = [(self, width, height)]
+        while stack:
+            node, width, height = stack.pop()
+            if node.direction is None:
+                buf += b'N'
+            elif node.direction == 'H':
+                pos = round(height * node.proportion)
+                buf += b'H'
+                buf += _pack_u32(pos)
+                stack.append((node.right, width, height - pos))
+                stack.append((node.left, width, pos))
+            else:  # 'V'
+                pos = round(width * node.proportion)
+                buf += b'V'
+                buf += _pack_u32(pos)
+                stack.append((node.right, width - pos, height))
+                stack.append((node.left, pos, height))
+        return bytes(buf)
+
+    def invalidate_cache(self):
+        """Drop the cached fakexrandr serialization, leaf count and
+        proportional regions of this tree."""
+        self._fxr_cache = None
+        self._leaf_count = None
+        self._prop_leaves = None
 
     def to_dict(self):
         if self.is_leaf:
@@ -279,27 +363,34 @@ class SplitTree:
         return node
 
     def copy(self):
-        if self.is_leaf:
-            leaf = SplitTree.new_leaf()
-            leaf.primary = self.primary
-            return leaf
-        return SplitTree(self.direction, self.proportion,
-                         self.left.copy(), self.right.copy())
+        root = SplitTree.new_leaf()
+        stack = [(self, root)]
+        while stack:
+            src, dst = stack.pop()
+            if src.direction is None:
+                dst.primary = src.primary
+                continue
+            dst.direction = src.direction
+            dst.proportion = src.proportion
+            dst.left = SplitTree.new_leaf()
+            dst.right = SplitTree.new_leaf()
+            stack.append((src.left, dst.left))
+            stack.append((src.right, dst.right))
+        return root
 
     def iter_leaves(self):
         """Yield (index, leaf) in spatial enumeration order — same order as
         leaf_regions, leaf_regions_proportional, and the ~N naming convention."""
-        idx = [0]
-
-        def walk(node):
-            if node.is_leaf:
-                yield (idx[0], node)
-                idx[0] += 1
-                return
-            yield from walk(node.left)
-            yield from walk(node.right)
-
-        yield from walk(self)
+        idx = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.direction is None:
+                yield (idx, node)
+                idx += 1
+            else:
+                stack.append(node.right)
+                stack.append(node.left)
 
     def primary_leaf_index(self):
         """Return the spatial index of the leaf with primary=True, or None."""
@@ -326,7 +417,8 @@ def _draw_tree_icon(cr, tree, w, h):
     cr.rectangle(0, 0, w, h)
     cr.fill()
     for i, (px, py, pw, ph) in enumerate(tree.leaf_regions_proportional()):
-        cr.set_source_rgba(*SPLIT_COLORS[i % len(SPLIT_COLORS)], 0.85)
+        r, g, b = SPLIT_COLORS[i % len(SPLIT_COLORS)]
+        cr.set_source_rgba(r, g, b, 0.85)
         cr.rectangle(px * w, py * h, pw * w, ph * h)
         cr.fill()
         cr.set_source_rgb(0, 0, 0)
@@ -407,7 +499,17 @@ class SplitEditorDialog(Gtk.Dialog):
         self._drag_mode = None  # 'new_split', 'move_edge'
         self._drag_target_leaf = None
         self._drag_target_edge = None
+        # Region of _drag_target_edge, fixed for the whole drag: moving a
+        # split only changes its own proportion, never its ancestors'.
+        self._drag_edge_region = None
         self._drag_decision = None  # 'H', 'V', or None
+        # Latest unhandled pointer position; see _on_motion.
+        self._motion_pending = None
+        # Flattened paint data for the current tree; rebuilt on demand
+        # after _tree_changed().
+        self._draw_cmds = None
+        # label -> (width, height) of its text at the fixed label size.
+        self._extents_cache = {}
 
         # Undo history: stack of tree snapshots taken BEFORE each
         # mutating operation (split-creation, edge-resize, edge-removal).
@@ -554,13 +656,13 @@ class SplitEditorDialog(Gtk.Dialog):
             return
         self._tree = self._undo_stack.pop()
         self._undo_button.set_sensitive(bool(self._undo_stack))
-        self._drawing_area.queue_draw()
+        self._tree_changed()
 
     def _reset_tree(self):
         """Replace the tree with a single leaf, pushing the prior state to undo."""
         self._push_undo()
         self._tree = SplitTree.new_leaf()
-        self._drawing_area.queue_draw()
+        self._tree_changed()
 
     def _make_preset_button(self, name, builder):
         """Icon button that applies preset `builder` (a fresh-tree factory)."""
@@ -584,7 +686,7 @@ class SplitEditorDialog(Gtk.Dialog):
         """Replace the tree with a fresh preset layout (undoable)."""
         self._push_undo()
         self._tree = builder()
-        self._drawing_area.queue_draw()
+        self._tree_changed()
 
     @property
     def split_tree(self):
@@ -609,73 +711,98 @@ class SplitEditorDialog(Gtk.Dialog):
         cr.stroke()
 
     def _draw_regions(self, cr, canvas_w, canvas_h):
-        color_idx = [0]
+        if self._draw_cmds is None:
+            self._draw_cmds = self._build_draw_cmds(cr, canvas_w, canvas_h)
+        fills, outlines, splits = self._draw_cmds
+
+        # Leaves never overlap, so each colour's rectangles go into one
+        # path and one fill, and all outlines into one stroke.
+        for r, g, b, rects in fills:
+            cr.set_source_rgba(r, g, b, 0.7)
+            for rect in rects:
+                cr.rectangle(*rect)
+            cr.fill()
+        cr.set_source_rgb(0, 0, 0)
+        cr.set_line_width(1)
+        for rect in outlines:
+            cr.rectangle(*rect)
+        cr.stroke()
 
-        def draw_node(node, x, y, w, h):
+        # Split lines, then labels on top of every line.
+        cr.set_source_rgb(1, 1, 1)
+        cr.set_line_width(2)
+        for x1, y1, x2, y2, _lx, _ly, _ew, _eh, _label in splits:
+            cr.move_to(x1, y1)
+            cr.line_to(x2, y2)
+        cr.stroke()
+        cr.set_font_size(10)
+        for _x1, _y1, _x2, _y2, lx, ly, ew, eh, label in splits:
+            cr.set_source_rgba(0, 0, 0, 0.7)
+            cr.rectangle(lx - 2, ly - eh - 2, ew + 4, eh + 4)
+            cr.fill()
+            cr.set_source_rgb(1, 1, 1)
+            cr.move_to(lx, ly)
+            cr.show_text(label)
+
+    def _build_draw_cmds(self, cr, canvas_w, canvas_h):
+        """Flatten the tree for _draw_regions: leaf rectangles bucketed
+        by colour, the same rectangles for outlining, and one
+        (line, label) entry per split."""
+        buckets = [[] for _ in SPLIT_COLORS]
+        outlines = []
+        splits = []
+        color_idx = 0
+        cr.set_font_size(10)
+        stack = [(self._tree, 0, 0, canvas_w, canvas_h)]
+        while stack:
+            node, x, y, w, h = stack.pop()
             if node.is_leaf:
-                ci = color_idx[0] % len(SPLIT_COLORS)
-                cr.set_source_rgba(*SPLIT_COLORS[ci], 0.7)
-                cr.rectangle(x, y, w, h)
-                cr.fill()
-                cr.set_source_rgb(0, 0, 0)
-                cr.set_line_width(1)
-                cr.rectangle(x, y, w, h)
-                cr.stroke()
-                color_idx[0] += 1
-                return
+                rect = (x, y, w, h)
+                buckets[color_idx % len(SPLIT_COLORS)].append(rect)
+                outlines.append(rect)
+                color_idx += 1
+                continue
 
             pct = int(round(node.proportion * 100))
             label = "%d/%d" % (pct, 100 - pct)
-
+            # Labels repeat ("50/50") and the font is fixed at 10.
+            size = self._extents_cache.get(label)
+            if size is None:
+                extents = cr.text_extents(label)
+                size = self._extents_cache[label] = (extents.width,
+                                                     extents.height)
+            ew, eh = size
             if node.direction == 'V':
                 left_w = w * node.proportion
-                draw_node(node.left, x, y, left_w, h)
-                draw_node(node.right, x + left_w, y, w - left_w, h)
-                # Draw split line
-                cr.set_source_rgb(1, 1, 1)
-                cr.set_line_width(2)
                 sx = x + left_w
-                cr.move_to(sx, y)
-                cr.line_to(sx, y + h)
-                cr.stroke()
-                # Draw percentage label
-                cr.set_font_size(10)
-                extents = cr.text_extents(label)
-                lx = sx - extents.width / 2
-                ly = y + h / 2 + extents.height / 2
-                cr.set_source_rgba(0, 0, 0, 0.7)
-                cr.rectangle(lx - 2, ly - extents.height - 2,
-                             extents.width + 4, extents.height + 4)
-                cr.fill()
-                cr.set_source_rgb(1, 1, 1)
-                cr.move_to(lx, ly)
-                cr.show_text(label)
+                splits.append((sx, y, sx, y + h,
+                               sx - ew / 2, y + h / 2 + eh / 2,
+                               ew, eh, label))
+                stack.append((node.right, sx, y, w - left_w, h))
+                stack.append((node.left, x, y, left_w, h))
             else:  # 'H'
                 top_h = h * node.proportion
-                draw_node(node.left, x, y, w, top_h)
-                draw_node(node.right, x, y + top_h, w, h - top_h)
-                cr.set_source_rgb(1, 1, 1)
-                cr.set_line_width(2)
                 sy = y + top_h
-                cr.move_to(x, sy)
-                cr.line_to(x + w, sy)
-                cr.stroke()
-                # Draw percentage label
-                cr.set_font_size(10)
-                extents = cr.text_extents(label)
-                lx = x + w / 2 - extents.width / 2
-                ly = sy + extents.height / 2
-                cr.set_source_rgba(0, 0, 0, 0.7)
-                cr.rectangle(lx - 2, ly - extents.height - 2,
-                             extents.width + 4, extents.height + 4)
-                cr.fill()
-                cr.set_source_rgb(1, 1, 1)
-                cr.move_to(lx, ly)
-                cr.show_text(label)
-
-        draw_node(self._tree, 0, 0, canvas_w, canvas_h)
+                splits.append((x, sy, x + w, sy,
+                               x + w / 2 - ew / 2, sy + eh / 2,
+                               ew, eh, label))
+                stack.append((node.right, x, sy, w, h - top_h))
+                stack.append((node.left, x, y, w, top_h))
+
+        fills = [color + (rects,)
+                 for color, rects in zip(SPLIT_COLORS, buckets) if rects]
+        return fills, outlines, splits
+
+    def _tree_changed(self):
+        """Drop caches derived from self._tree and repaint."""
+        self._tree.invalidate_cache()
+        self._draw_cmds = None
+        self._drawing_area.queue_draw()
 
     SNAP_PERCENT = 5  # snap to nearest N%
+    _SNAP_STEP = SNAP_PERCENT / 100.0
+    _SNAP_MIN = 0.1
+    _SNAP_MAX = 0.9
 
     def _px_to_prop(self, px_x, px_y):
         """Convert pixel coordinates to proportional 0.0-1.0 space."""
@@ -683,9 +810,13 @@ class SplitEditorDialog(Gtk.Dialog):
 
     def _snap(self, prop):
         """Snap a proportion to the nearest SNAP_PERCENT increment, clamped to [0.1, 0.9]."""
-        step = self.SNAP_PERCENT / 100.0
+        step = self._SNAP_STEP
         snapped = round(prop / step) * step
-        return max(0.1, min(0.9, snapped))
+        if snapped < self._SNAP_MIN:
+            return self._SNAP_MIN
+        if snapped > self._SNAP_MAX:
+            return self._SNAP_MAX
+        return snapped
 
     GRAB_RADIUS_PX = 8  # how close (in canvas pixels) you have to click to grab an edge
 
@@ -698,6 +829,8 @@ class SplitEditorDialog(Gtk.Dialog):
         )
 
     def _on_button_press(self, widget, event):
+        # A queued hover motion must not be replayed as part of the drag.
+        self._apply_motion()
         if event.button == 3:
             # Right-click: remove nearest edge.  Convert that subtree
             # back to a single leaf — discards both children.  The
@@ -715,7 +848,7 @@ class SplitEditorDialog(Gtk.Dialog):
                 node.left = None
                 node.right = None
                 node.primary = False
-                self._drawing_area.queue_draw()
+                self._tree_changed()
             return
 
         if event.button == 1:
@@ -727,6 +860,7 @@ class SplitEditorDialog(Gtk.Dialog):
             if edge:
                 self._drag_mode = 'move_edge'
                 self._drag_target_edge = edge[0]  # the split node
+                self._drag_edge_region = self._tree.find_node_region(edge[0])
                 # Snapshot before resize starts (motion events will mutate
                 # node.proportion in place; pushing once at drag start
                 # gives the user a single Undo to revert the whole drag).
@@ -744,24 +878,42 @@ class SplitEditorDialog(Gtk.Dialog):
             self._drag_target_leaf = result[0]  # the leaf node
 
     def _on_button_release(self, widget, event):
+        # Land the drag at its final position before ending it.
+        self._apply_motion()
         self._mouse_down_at = None
         self._drag_mode = None
         self._drag_target_leaf = None
         self._drag_target_edge = None
+        self._drag_edge_region = None
         self._drag_decision = None
 
     def _on_motion(self, widget, event):
+        # Coalesce: motion events can arrive far faster than frames, so
+        # only the latest position is handled, once per idle.
+        pending = self._motion_pending
+        self._motion_pending = (event.x, event.y)
+        if pending is None:
+            GLib.idle_add(self._apply_motion)
+
+    def _apply_motion(self):
+        pending = self._motion_pending
+        self._motion_pending = None
+        if pending is not None:
+            self._handle_motion(*pending)
+        return False
+
+    def _handle_motion(self, x, y):
         if not self._mouse_down_at:
             # Hover feedback: change cursor when over a draggable edge.
-            self._update_hover_cursor(event.x, event.y)
+            self._update_hover_cursor(x, y)
             return
 
         if self._drag_mode == 'move_edge':
             node = self._drag_target_edge
             if node is None:
                 return
-            px, py = self._px_to_prop(event.x, event.y)
-            region = self._tree.find_node_region(node)
+            px, py = self._px_to_prop(x, y)
+            region = self._drag_edge_region
             if node.direction == 'V':
                 if region:
                     rx, ry, rw, rh = region
@@ -776,7 +928,7 @@ class SplitEditorDialog(Gtk.Dialog):
                 else:
                     new_prop = py
                 node.proportion = self._snap(new_prop)
-            self._drawing_area.queue_draw()
+            self._tree_changed()
             return
 
         if self._drag_mode == 'new_split':
@@ -784,8 +936,8 @@ class SplitEditorDialog(Gtk.Dialog):
             if leaf is None:
                 return
 
-            xdiff = abs(event.x - self._mouse_down_at[0])
-            ydiff = abs(event.y - self._mouse_down_at[1])
+            xdiff = abs(x - self._mouse_down_at[0])
+            ydiff = abs(y - self._mouse_down_at[1])
 
             threshold = 20  # pixels
 
@@ -800,7 +952,7 @@ class SplitEditorDialog(Gtk.Dialog):
                     self._push_undo()
 
             if self._drag_decision is not None:
-                px, py = self._px_to_prop(event.x, event.y)
+                px, py = self._px_to_prop(x, y)
                 # Find the leaf's region
                 result = self._tree.get_split_for_point(px, py)
                 _, rx, ry, rw, rh = result
@@ -823,9 +975,10 @@ class SplitEditorDialog(Gtk.Dialog):
                 # After creating the split, switch to move mode for fine-tuning
                 self._drag_mode = 'move_edge'
                 self._drag_target_edge = leaf
+                self._drag_edge_region = self._tree.find_node_region(leaf)
                 self._drag_target_leaf = None
 
-                self._drawing_area.queue_draw()
+                self._tree_changed()
 
     def _update_hover_cursor(self, ex, ey):
         edge = self._find_edge_at(ex, ey)
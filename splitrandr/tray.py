@@ -12,7 +12,7 @@ Tries XApp.StatusIcon (Cinnamon-native), then Gtk.StatusIcon,
 then AppIndicator3 as fallback.
 """
 
-import subprocess
+import threading
 
 import gi
 gi.require_version('Gtk', '3.0')
@@ -59,6 +59,11 @@ class _XAppBackend:
     def set_activate_callback(self, callback):
         self.icon.connect('activate', lambda icon, button, time: callback())
 
+    def set_before_popup_callback(self, callback):
+        # XApp emits button-press-event before it pops up either menu.
+        self.icon.connect('button-press-event', lambda *args: callback())
+        return True
+
     def destroy(self):
         self.icon.set_visible(False)
 
@@ -69,6 +74,7 @@ class _GtkStatusIconBackend:
         self.icon.set_from_icon_name('video-display')
         self.icon.set_tooltip_text('SplitRandR')
         self._menu = None
+        self._before_popup = None
 
     def set_menu(self, menu):
         self._menu = menu
@@ -80,6 +86,8 @@ class _GtkStatusIconBackend:
 
     def _on_popup(self, icon, button, time):
         if self._menu:
+            if self._before_popup:
+                self._before_popup()
             self._menu.popup(None, None,
                              Gtk.StatusIcon.position_menu, icon,
                              button, time)
@@ -87,6 +95,10 @@ class _GtkStatusIconBackend:
     def set_activate_callback(self, callback):
         self.icon.connect('activate', lambda icon: callback())
 
+    def set_before_popup_callback(self, callback):
+        self._before_popup = callback
+        return True
+
     def destroy(self):
         self.icon.set_visible(False)
 
@@ -106,6 +118,9 @@ class _AppIndicatorBackend:
     def set_activate_callback(self, callback):
         pass  # AppIndicator3 doesn't support left-click activate
 
+    def set_before_popup_callback(self, callback):
+        return False  # the menu is exported over D-Bus; keep it current
+
     def destroy(self):
         from gi.repository import AppIndicator3
         self.indicator.set_status(AppIndicator3.IndicatorStatus.PASSIVE)
@@ -116,28 +131,50 @@ class SplitRandRTray:
         self.app = app
         self._backend = _create_backend()
         self._backend.set_activate_callback(self._on_activate)
+        self._menu = None
+        self._separator = None
+        self._profile_items = {}  # profile name -> its menu item
+        # Never shown; anchors the radio group and is the item that is
+        # "active" when no listed profile is, since a GTK radio group
+        # cannot have every member inactive.
+        self._no_profile_item = Gtk.RadioMenuItem()
+        # Set while _sync_menu flips items, so toggled isn't taken as a click.
+        self._syncing = False
+        # Profile items need a _sync_menu() before the next popup.
+        self._menu_stale = False
+        # Built on first use and hidden, not destroyed, between prompts.
+        self._confirm_dialog = None
+        self._count_label = None
+        # Set while the confirm dialog's nested main loop is running.
+        self._confirm_active = False
         self._build_menu()
+        self._lazy = self._backend.set_before_popup_callback(
+            self._on_before_popup)
+        if self._lazy:
+            # The menu is popped up locally: list profiles on first click.
+            self._menu_stale = True
+        else:
+            # Stale-while-revalidate: paint from the last known profile
+            # list so the tray doesn't wait on a PROFILES_DIR scan, then
+            # rescan off the main loop and resync only if it changed.
+            stale = profiles.cached_profile_list()
+            self._sync_menu(stale)
+            if stale is not None:
+                threading.Thread(target=self._revalidate_profiles,
+                                 args=(stale,), daemon=True).start()
+
+    def _revalidate_profiles(self, stale):
+        names = profiles.list_profiles()
+        if names != stale:
+            GLib.idle_add(self._sync_menu, names)
 
     def _build_menu(self):
+        """Build the menu once; profile items are kept current by
+        _sync_menu() rather than by rebuilding the whole menu."""
         menu = Gtk.Menu()
-        active = profiles.get_active_profile()
-        names = profiles.list_profiles()
 
-        # CheckMenuItem drawn as radio; exclusivity is enforced by the
-        # rebuild in _on_profile_toggled, not by a widget group.
-        # (Gtk.CheckMenuItem has no join_group — that's RadioMenuItem
-        # API — so the old group code raised AttributeError the moment
-        # a second profile existed.)
-        for name in names:
-            item = Gtk.CheckMenuItem(label=name)
-            item.set_draw_as_radio(True)
-            if name == active:
-                item.set_active(True)
-            item.connect('toggled', self._on_profile_toggled, name)
-            menu.append(item)
-
-        if names:
-            menu.append(Gtk.SeparatorMenuItem())
+        self._separator = Gtk.SeparatorMenuItem()
+        menu.append(self._separator)
 
         open_item = Gtk.MenuItem(label=_("Open Editor"))
         open_item.connect('activate', self._on_open_editor)
@@ -148,55 +185,133 @@ class SplitRandRTray:
         menu.append(quit_item)
 
         menu.show_all()
+        self._separator.hide()
+        self._menu = menu
         self._backend.set_menu(menu)
 
+    def _sync_menu(self, names=None):
+        """Add/remove profile items to match `names` (default: rescan)
+        and mark the active profile, leaving unchanged items alone."""
+        if names is None:
+            names = profiles.list_profiles()
+        items = self._profile_items
+
+        for name in [n for n in items if n not in names]:
+            items.pop(name).destroy()
+
+        # `names` is sorted and so are the surviving items, so inserting
+        # each new one at its index keeps the menu in order.
+        for i, name in enumerate(names):
+            if name not in items:
+                item = Gtk.RadioMenuItem.new_with_label_from_widget(
+                    self._no_profile_item, name)
+                item.connect('toggled', self._on_profile_toggled, name)
+                self._menu.insert(item, i)
+                item.show()
+                items[name] = item
+
+        self._separator.set_visible(bool(names))
+        self._sync_active(profiles.get_active_profile())
+        return False  # one-shot when run from GLib.idle_add
+
+    def _sync_active(self, active):
+        """Select the item for `active` without rescanning the profile
+        list; the radio group deselects the previous one."""
+        item = self._profile_items.get(active, self._no_profile_item)
+        if item.get_active():
+            return
+        self._syncing = True
+        try:
+            item.set_active(True)
+        finally:
+            self._syncing = False
+
     def refresh_menu(self):
-        self._build_menu()
+        if self._lazy:
+            self._menu_stale = True
+        else:
+            self._sync_menu()
 
-    def _confirm_or_revert(self, revert_script, previous_active):
-        """Show a GNOME-style confirmation countdown dialog.
-
-        Returns True if the user kept changes, False if reverted.
-        """
-        import os
-        COUNTDOWN = 30
-        state = {'remaining': COUNTDOWN, 'timer_id': None}
+    def _on_before_popup(self):
+        if self._menu_stale:
+            self._menu_stale = False
+            self._sync_menu()
 
+    def _build_confirm_dialog(self, template):
         dialog = Gtk.MessageDialog(
             modal=True,
             message_type=Gtk.MessageType.QUESTION,
             text=_("Does the display look OK?"),
         )
-        dialog.format_secondary_text(
-            _("Reverting in %d seconds\u2026") % state['remaining']
-        )
         dialog.add_button(_("Revert Settings"), Gtk.ResponseType.REJECT)
         dialog.add_button(_("Keep Changes"), Gtk.ResponseType.ACCEPT)
         dialog.set_default_response(Gtk.ResponseType.ACCEPT)
         dialog.set_keep_above(True)
 
-        secondary_label = dialog.get_message_area().get_children()[1]
+        # Only the number changes per tick, so keep it in its own label and
+        # leave the translated text around it static.
+        prefix, _sep, suffix = template.partition('%d')
+        self._count_label = Gtk.Label()
+        countdown_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+        countdown_box.pack_start(Gtk.Label(label=prefix), False, False, 0)
+        countdown_box.pack_start(self._count_label, False, False, 0)
+        countdown_box.pack_start(Gtk.Label(label=suffix), False, False, 0)
+        countdown_box.show_all()
+        dialog.get_message_area().pack_start(countdown_box, False, False, 0)
+        self._confirm_dialog = dialog
+
+    def _confirm_or_revert(self, revert_script, previous_active):
+        """Show a GNOME-style confirmation countdown dialog.
+
+        Returns True if the user kept changes, False if reverted.
+        """
+        import os
+        COUNTDOWN = 30
+        state = {'tick_id': None, 'stop_id': None}
+        template = _("Reverting in %d seconds\u2026")
+
+        if self._confirm_dialog is None:
+            self._build_confirm_dialog(template)
+        dialog = self._confirm_dialog
+        count_label = self._count_label
+        count_label.set_text(str(COUNTDOWN))
 
         def _raise():
             dialog.present_with_time(Gdk.CURRENT_TIME)
             return False
         GLib.idle_add(_raise)
 
+        # Count down against a monotonic deadline, so a late or skipped
+        # tick can't stretch the countdown; the tick only updates the label.
+        deadline = GLib.get_monotonic_time() + COUNTDOWN * 1000000
+
         def tick():
-            state['remaining'] -= 1
-            if state['remaining'] <= 0:
+            remaining = -(-(deadline - GLib.get_monotonic_time()) // 1000000)
+            if remaining <= 0:
+                state['tick_id'] = None
                 dialog.response(Gtk.ResponseType.REJECT)
                 return False
-            secondary_label.set_text(
-                _("Reverting in %d seconds\u2026") % state['remaining']
-            )
+            count_label.set_text(str(remaining))
             return True
 
-        state['timer_id'] = GLib.timeout_add_seconds(1, tick)
+        def stop():
+            state['stop_id'] = None
+            dialog.response(Gtk.ResponseType.REJECT)
+            return False
+
+        state['tick_id'] = GLib.timeout_add(1000, tick,
+                                            priority=GLib.PRIORITY_LOW)
+        state['stop_id'] = GLib.timeout_add(COUNTDOWN * 1000, stop)
 
-        response = dialog.run()
-        GLib.source_remove(state['timer_id'])
-        dialog.destroy()
+        self._confirm_active = True
+        try:
+            response = dialog.run()
+        finally:
+            self._confirm_active = False
+        for source_id in state.values():
+            if source_id is not None:
+                GLib.source_remove(source_id)
+        dialog.hide()
 
         if response != Gtk.ResponseType.ACCEPT:
             # Clear fakexrandr config so xrandr sees real physical outputs
@@ -205,23 +320,45 @@ class SplitRandRTray:
                 os.remove(CONFIG_PATH)
             except FileNotFoundError:
                 pass
-            subprocess.Popen(['sh', '-c', revert_script])
+            # posix_spawn: no pipes needed, and it skips fork()'s copy of
+            # this process's page tables. The child watch reaps it and,
+            # as the script changed X behind _run's back, drops cached
+            # xrandr queries once it is done.
+            from .xrandr_invoke import invalidate_query_cache
+            pid = os.posix_spawn('/bin/sh', ['sh', '-c', revert_script],
+                                 os.environ)
+            invalidate_query_cache()
+            GLib.child_watch_add(GLib.PRIORITY_DEFAULT, pid,
+                                 lambda *args: invalidate_query_cache())
             profiles.set_active_profile(previous_active)
             return False
         return True
 
     def _on_profile_toggled(self, item, name):
-        if item.get_active():
-            previous_active = profiles.get_active_profile()
-            revert_script = None
-            if self.app and hasattr(self.app, 'widget'):
-                revert_script = self.app.widget._xrandr.save_to_shellscript_string()
-            profiles.apply_profile(name)
-            if revert_script is not None:
-                if not self._confirm_or_revert(revert_script, previous_active):
-                    self._build_menu()
-                    return
-            self._build_menu()
+        if self._syncing:
+            return
+        if self._confirm_active:
+            # A switch is still awaiting confirmation; ignore the click.
+            self._sync_active(profiles.get_active_profile())
+            return
+        if not item.get_active():
+            return
+        previous_active = profiles.get_active_profile()
+        revert_script = None
+        if self.app and hasattr(self.app, 'widget'):
+            # Taken on the main loop: it reads the editor's live
+            # configuration, which only the main loop may touch.
+            revert_script = self.app.widget._xrandr.save_to_shellscript_string()
+        self._switch_profile(name, previous_active, revert_script)
+
+    def _switch_profile(self, name, previous_active, revert_script):
+        if not profiles.apply_profile(name):
+            self._sync_active(previous_active)
+            return
+        # On success the toggled item is already the active one.
+        if revert_script is not None:
+            if not self._confirm_or_revert(revert_script, previous_active):
+                self._sync_active(previous_active)
 
     def _on_activate(self):
         self._on_open_editor(None)
@@ -238,6 +375,7 @@ class SplitRandRTray:
             win.deiconify()
             win.present_with_time(Gdk.CURRENT_TIME)
         else:
+            import subprocess
             subprocess.Popen(['splitrandr'])
 
     def _on_quit(self, _item):
@@ -13,7 +13,8 @@ import math
 import gi
 gi.require_version('Gtk', '3.0')
 gi.require_version('PangoCairo', '1.0')
-from gi.repository import GObject, Gtk, Pango, PangoCairo, Gdk, GLib
+gi.require_version('GdkPixbuf', '2.0')
+from gi.repository import GObject, Gtk, Pango, PangoCairo, Gdk, GdkPixbuf, GLib
 import cairo
 
 from .snap import Snap
@@ -24,10 +25,28 @@ from .cinnamon_compat import query_cinnamon_monitors
 from .i18n import _
 
 
+# Palette shared by every MonitorWidget; dropped when the GTK theme changes.
+_THEME_COLORS_CACHE = None
+_theme_watch = None
+
+
+def _on_theme_changed(_settings, _pspec):
+    global _THEME_COLORS_CACHE
+    _THEME_COLORS_CACHE = None
+
+
 def _get_theme_colors():
     """Derive the canvas palette from the loaded GTK theme, with the
     previous hardcoded values as fallbacks for themes that don't define
     the named colors."""
+    global _THEME_COLORS_CACHE, _theme_watch
+    if _THEME_COLORS_CACHE is not None:
+        return _THEME_COLORS_CACHE
+    if _theme_watch is None:
+        settings = Gtk.Settings.get_default()
+        if settings is not None:
+            _theme_watch = settings.connect(
+                'notify::gtk-theme-name', _on_theme_changed)
     ctx = Gtk.Button().get_style_context()
 
     def lookup(name, fallback):
@@ -48,7 +67,7 @@ def _get_theme_colors():
     borders = lookup('borders', (0.5, 0.5, 0.5, 1.0))
     is_dark = (bg[0] + bg[1] + bg[2]) / 3 < 0.5
 
-    return {
+    _THEME_COLORS_CACHE = {
         # Widget background behind everything.
         'canvas_bg': shade(bg, 0.8 if is_dark else 0.93),
         # The virtual-screen bounding box the monitors sit on.
@@ -65,6 +84,7 @@ def _get_theme_colors():
         'pill_bg': (0.0, 0.0, 0.0, 0.6),
         'pill_fg': (1.0, 1.0, 1.0, 0.95),
     }
+    return _THEME_COLORS_CACHE
 
 
 def _rounded_rect(cr, x, y, w, h, r=6):
@@ -77,6 +97,37 @@ def _rounded_rect(cr, x, y, w, h, r=6):
     cr.close_path()
 
 
+# (w, h, r) -> cairo.Path of a rounded rectangle at the origin; tiles
+# are stroked, filled and clipped with the same few shapes on every draw.
+_ROUNDED_PATHS = {}
+_ROUNDED_PATHS_MAX = 32
+_path_scratch = None
+
+
+def _append_rounded_rect(cr, x, y, w, h, r=6):
+    """Add a rounded rectangle to cr's path, like _rounded_rect, but
+    replay a cached path instead of rebuilding its arcs each time."""
+    global _path_scratch
+    key = (w, h, r)
+    path = _ROUNDED_PATHS.get(key)
+    if path is None:
+        if _path_scratch is None:
+            _path_scratch = cairo.Context(
+                cairo.ImageSurface(cairo.FORMAT_A1, 1, 1))
+        _path_scratch.new_path()
+        _rounded_rect(_path_scratch, 0, 0, w, h, r)
+        path = _path_scratch.copy_path()
+        if len(_ROUNDED_PATHS) >= _ROUNDED_PATHS_MAX:
+            _ROUNDED_PATHS.clear()
+        _ROUNDED_PATHS[key] = path
+    # The path is stored in device space when appended, so restoring the
+    # translation afterwards leaves it in place.
+    cr.save()
+    cr.translate(x, y)
+    cr.append_path(path)
+    cr.restore()
+
+
 class _MonitorIdentifier(Gtk.Window):
     """Temporary overlay shown on the physical monitor to help identify it."""
 
@@ -152,6 +203,7 @@ class MonitorWidget(Gtk.DrawingArea):
     _selected_output = None
     _indicator = None
     _indicator_timer = None
+    _redraw_pending = False
 
     __gsignals__ = {
         'changed': (GObject.SignalFlags.RUN_LAST, GObject.TYPE_NONE, ()),
@@ -165,8 +217,9 @@ class MonitorWidget(Gtk.DrawingArea):
     @selected_output.setter
     def selected_output(self, name):
         if name != self._selected_output:
+            self._repaint_output(self._selected_output)
             self._selected_output = name
-            self._force_repaint()
+            self._repaint_output(name)
             self.emit('selection-changed')
             if not self._readonly:
                 self._show_monitor_indicator(name)
@@ -193,7 +246,29 @@ class MonitorWidget(Gtk.DrawingArea):
         self._show_splits = show_splits
         self._theme_colors = _get_theme_colors()
         self._screenshots = {}
+        # name -> (inputs, cairo.RecordingSurface); see _output_surface.
+        self._output_surfaces = {}
+        # (name, text height, primary, max width) -> (layout, w, h) of the
+        # name pill text; all pills in a pane share one font size.
+        self._label_cache = {}
+        self._label_font = (None, None)
+        self._root_window = Gdk.get_default_root_window()
+        # None until probed; False where the root window can't be read
+        # back (Wayland, restricted compositors).
+        self._screenshots_supported = None
+        self._capture_on_map = None
+        # Factor the screenshots were downscaled for; zooming in past it
+        # schedules a recapture (see _update_size_request).
+        self._screenshots_factor = None
+        self._recapture_timer = None
         self._monitors = []
+        # (name, x0, y0, x1, y1) per monitor in _monitors order, for the
+        # pointer hit tests that run on every motion event.
+        self._hit_rects = []
+        # _hit_rects grown by the one-widget-pixel grab margin, for the
+        # factor in _hit_boxes_factor; see _hit_boxes().
+        self._hit_boxes_cache = []
+        self._hit_boxes_factor = None
         self._is_cinnamon = False
 
         self.set_size_request(
@@ -277,11 +352,36 @@ class MonitorWidget(Gtk.DrawingArea):
                 'splits': cfg.splits.get(name) if self._show_splits else None,
                 'border': cfg.borders.get(name, 0) if self._show_splits else 0,
             })
+        self._rebuild_hit_rects()
+
+    def _rebuild_hit_rects(self):
+        self._hit_rects = [
+            (m['name'], m['x'], m['y'], m['x'] + m['w'], m['y'] + m['h'])
+            for m in self._monitors]
+        self._hit_boxes_factor = None
+
+    def _hit_boxes(self):
+        fac = self._factor
+        if self._hit_boxes_factor != fac:
+            self._hit_boxes_cache = [
+                (name, x0 - fac, y0 - fac, x1 + fac, y1 + fac)
+                for name, x0, y0, x1, y1 in self._hit_rects]
+            self._hit_boxes_factor = fac
+        return self._hit_boxes_cache
+
+    def _monitors_extent(self):
+        """Virtual-pixel (right, bottom) of the furthest monitor edges."""
+        max_x = max_y = 0
+        for _name, _x0, _y0, x1, y1 in self._hit_rects:
+            if x1 > max_x:
+                max_x = x1
+            if y1 > max_y:
+                max_y = y1
+        return max_x, max_y
 
     def _content_extent(self):
         """Virtual-pixel size of the drawn content, with a 5% margin."""
-        max_x = max(m['x'] + m['w'] for m in self._monitors)
-        max_y = max(m['y'] + m['h'] for m in self._monitors)
+        max_x, max_y = self._monitors_extent()
         return int(max_x * 1.05), int(max_y * 1.05)
 
     def _update_size_request(self):
@@ -296,7 +396,14 @@ class MonitorWidget(Gtk.DrawingArea):
                     1, math.ceil(max(cw / avail_w, ch / avail_h)))
         elif self._fit_height:
             self._factor = max(1, math.ceil(ch / self._fit_height))
-        self.set_size_request(int(cw / self.factor), int(ch / self.factor))
+        fac = self._factor
+        self.set_size_request(int(cw / fac), int(ch / fac))
+        if (self._screenshots and self._recapture_timer is None
+                and fac < self._screenshots_factor):
+            # Tiles are now drawn larger than the captures; upscaling
+            # them would blur, so grab them again once resizing settles.
+            self._recapture_timer = GLib.timeout_add(
+                200, self._recapture_screenshots)
 
     def set_fit_size(self, width, height):
         """Fit the canvas into a (width, height) pixel slot; called by
@@ -331,26 +438,62 @@ class MonitorWidget(Gtk.DrawingArea):
     #################### screenshots ####################
 
     def _capture_screenshots(self):
-        """Capture a screenshot of each active output from the root window."""
+        """Capture a screenshot of each active output from the root window.
+
+        Each capture is downscaled straight away to the size it is drawn
+        at and kept as a cairo surface, so painting neither resamples a
+        full-resolution pixbuf nor converts it again."""
         self._screenshots = {}
-        try:
-            root = Gdk.get_default_root_window()
-            if root is None:
-                return
-        except Exception:
-            return
+        root = self._root_window
+        if root is None or self._screenshots_supported is False:
+            return False
+        if self._screenshots_supported is None:
+            try:
+                probe = Gdk.pixbuf_get_from_window(root, 0, 0, 1, 1)
+            except Exception:
+                probe = None
+            self._screenshots_supported = probe is not None
+            if probe is None:
+                return False
+        if not self.get_mapped():
+            # Nothing shows them yet; capture once the widget appears.
+            if self._capture_on_map is None:
+                self._capture_on_map = self.connect(
+                    'map', self._on_map_capture)
+            return False
 
+        self._screenshots_factor = self.factor
+        scale = self.get_scale_factor() / self.factor
+        # Screenshot surfaces are made similar to our GdkWindow so the
+        # backend can keep them in its preferred (possibly server-side)
+        # format rather than a plain client-side image surface.
+        target = self.get_window()
         for m in self._monitors:
             name = m['name']
             x, y, w, h = m['x'], m['y'], m['w'], m['h']
             try:
                 pb = Gdk.pixbuf_get_from_window(root, x, y, w, h)
                 if pb:
-                    self._screenshots[name] = pb
+                    pb = pb.scale_simple(
+                        max(1, round(w * scale)), max(1, round(h * scale)),
+                        GdkPixbuf.InterpType.BILINEAR)
+                if pb:
+                    self._screenshots[name] = (
+                        Gdk.cairo_surface_create_from_pixbuf(pb, 1, target))
             except Exception:
                 pass
 
         self._force_repaint()
+        return False
+
+    def _recapture_screenshots(self):
+        self._recapture_timer = None
+        return self._capture_screenshots()
+
+    def _on_map_capture(self, _widget):
+        self.disconnect(self._capture_on_map)
+        self._capture_on_map = None
+        GLib.timeout_add(200, self._capture_screenshots)
 
     #################### monitor identifier overlay ####################
 
@@ -388,12 +531,14 @@ class MonitorWidget(Gtk.DrawingArea):
 
     #################### loading ####################
 
-    def load_from_x(self):
-        self._xrandr.load_from_x()
+    def load_from_x(self, probe=False):
+        self._xrandr.load_from_x(probe)
         self._xrandr_was_reloaded()
 
     def _xrandr_was_reloaded(self):
         self._is_cinnamon = False
+        self._output_surfaces.clear()
+        self._label_cache.clear()
         self._sync_monitors()
 
         # Validate selection: accept either a physical name or a virtual
@@ -408,8 +553,7 @@ class MonitorWidget(Gtk.DrawingArea):
             elif leaf_idx is not None and phys in active_names:
                 tree = self._xrandr.configuration.splits.get(phys)
                 if tree and not tree.is_leaf:
-                    leaf_count = sum(1 for _ in tree.iter_leaves())
-                    valid = 0 <= leaf_idx < leaf_count
+                    valid = 0 <= leaf_idx < tree.count_leaves()
         if not valid:
             if len(active_names) == 1:
                 self._selected_output = active_names[0]
@@ -437,6 +581,8 @@ class MonitorWidget(Gtk.DrawingArea):
             return
 
         self._is_cinnamon = True
+        self._output_surfaces.clear()
+        self._label_cache.clear()
         self._monitors = []
         for m in monitors:
             self._monitors.append({
@@ -448,6 +594,7 @@ class MonitorWidget(Gtk.DrawingArea):
                 'splits': None,
                 'border': 0,
             })
+        self._rebuild_hit_rects()
 
         # Validate selection
         names = [m['name'] for m in self._monitors]
@@ -530,6 +677,8 @@ class MonitorWidget(Gtk.DrawingArea):
             if tree is not None:
                 tree.clear_primary()
 
+        # Leaf primaries are changed in place, which the surface keys miss.
+        self._output_surfaces.clear()
         self._sync_monitors()
         self._force_repaint()
         self.emit('changed')
@@ -619,15 +768,10 @@ class MonitorWidget(Gtk.DrawingArea):
             return
 
         old_hover = self._hover_output
-        undermouse = self._get_point_outputs(event.x, event.y)
-        if undermouse:
-            # Topmost monitor in _monitors list order (last in list = on top)
-            self._hover_output = [m['name'] for m in self._monitors
-                                  if m['name'] in undermouse][-1]
-        else:
-            self._hover_output = None
+        self._hover_output = self._get_point_topmost_output(event.x, event.y)
         if old_hover != self._hover_output:
-            self._force_repaint()
+            self._repaint_output(old_hover)
+            self._repaint_output(self._hover_output)
 
         # Cursor feedback when hovering over a draggable split line.
         win = self.get_window()
@@ -670,11 +814,14 @@ class MonitorWidget(Gtk.DrawingArea):
         else:
             new_prop = (real_y / mon['h'] - ry) / rh if rh > 0 else 0.5
         node.proportion = self._snap_proportion(new_prop)
+        tree.invalidate_cache()
+        self._output_surfaces.pop(output_name, None)
         self._force_repaint()
 
     def _on_release(self, _widget, event):
         if event.button == 1 and self._split_drag is not None:
             self._split_drag = None
+            self.get_window().set_event_compression(True)
             # Re-enable monitor drag-and-drop after our split-resize gesture.
             self._enable_monitor_drag_source()
             self._sync_monitors()
@@ -684,11 +831,12 @@ class MonitorWidget(Gtk.DrawingArea):
     #################### painting ####################
 
     def do_expose_event(self, _event, context):
-        # Theme background fills the entire allocation
-        alloc = self.get_allocation()
+        # Theme background fills the entire allocation. A bare SOURCE
+        # paint takes cairo's solid-fill path instead of filling a path.
+        context.set_operator(cairo.OPERATOR_SOURCE)
         context.set_source_rgba(*self._theme_colors['canvas_bg'])
-        context.rectangle(0, 0, alloc.width, alloc.height)
-        context.fill()
+        context.paint()
+        context.set_operator(cairo.OPERATOR_OVER)
 
         if not self._monitors:
             return
@@ -706,8 +854,7 @@ class MonitorWidget(Gtk.DrawingArea):
         fac = self.factor
 
         # Virtual-screen bounding box the monitors sit on
-        max_x = max(m['x'] + m['w'] for m in self._monitors)
-        max_y = max(m['y'] + m['h'] for m in self._monitors)
+        max_x, max_y = self._monitors_extent()
         colors = self._theme_colors
         _rounded_rect(context, 0, 0, max_x, max_y, 6 * fac)
         context.set_source_rgba(*colors['workarea'])
@@ -722,113 +869,160 @@ class MonitorWidget(Gtk.DrawingArea):
         label_font_px = max(11, min(alloc_h * 0.05, 22)) * fac
 
         for mon in self._monitors:
-            name = mon['name']
-            rect = (mon['x'], mon['y'], mon['w'], mon['h'])
-            center = rect[0] + rect[2] / 2, rect[1] + rect[3] / 2
-
-            is_hover = (not self._readonly and name == self._hover_output)
-            is_selected = (name == self._selected_output)
-            # ~6px on-screen corner radius, capped for tiny tiles
-            radius = min(6 * fac, min(rect[2], rect[3]) * 0.1)
-
-            # Fill
-            bg = colors['bg_hover'] if is_hover else colors['bg']
-            _rounded_rect(context, rect[0], rect[1], rect[2], rect[3], radius)
-            context.set_source_rgba(*bg)
-            context.fill()
+            context.set_source_surface(
+                self._output_surface(mon, label_font_px), mon['x'], mon['y'])
+            context.paint()
+
+    def _output_surface(self, mon, label_font_px):
+        """Return a recording of one monitor tile, drawn at the origin.
+
+        The recording is replayed on every draw and only re-recorded
+        when something it depends on changes; in-place split tree edits
+        must drop it via _output_surfaces."""
+        name = mon['name']
+        is_hover = (not self._readonly and name == self._hover_output)
+        is_selected = (name == self._selected_output)
+        # Determine selected leaf for this monitor (if any)
+        selected_leaf_idx = None
+        sel = self._selected_output
+        if sel and mon['splits']:
+            sel_phys, sel_leaf = self.parse_virtual_name(sel)
+            if sel_phys == name and sel_leaf is not None:
+                selected_leaf_idx = sel_leaf
 
-            # Screenshot thumbnail — near-opaque: on hardware without
-            # usable EDID names the content is the primary
-            # which-monitor-is-which signal.
-            if name in self._screenshots:
-                pb = self._screenshots[name]
-                context.save()
-                _rounded_rect(context, rect[0], rect[1], rect[2], rect[3], radius)
-                context.clip()
-                sx = rect[2] / pb.get_width()
-                sy = rect[3] / pb.get_height()
-                context.translate(rect[0], rect[1])
-                context.scale(sx, sy)
-                Gdk.cairo_set_source_pixbuf(context, pb, 0, 0)
-                context.paint_with_alpha(0.8)
-                context.restore()
-                if is_hover:
-                    _rounded_rect(context, rect[0], rect[1],
-                                  rect[2], rect[3], radius)
-                    context.set_source_rgba(1, 1, 1, 0.08)
-                    context.fill()
-
-            # Border stroke: accent ring when selected, hairline otherwise.
-            # Read-only panes (thumbnails) get a thinner mirror-selection
-            # ring so it reads as a hint, not a frame.
-            _rounded_rect(context, rect[0], rect[1], rect[2], rect[3], radius)
-            if is_selected:
-                context.set_source_rgba(*colors['accent'])
-                context.set_line_width((1 if self._readonly else 2) * fac)
-            else:
-                context.set_source_rgba(*colors['border'])
-                context.set_line_width(1 * fac)
-            context.stroke()
+        fac = self.factor
+        key = (mon['w'], mon['h'], mon['rotation'], mon['primary'],
+               mon['splits'], mon['border'], self._screenshots.get(name),
+               is_hover, is_selected, selected_leaf_idx, fac, label_font_px)
+        cached = self._output_surfaces.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        # Room for the half of the border stroke that lies outside the tile.
+        pad = 2 * fac
+        surface = cairo.RecordingSurface(
+            cairo.CONTENT_COLOR_ALPHA,
+            cairo.Rectangle(-pad, -pad, mon['w'] + 2 * pad, mon['h'] + 2 * pad))
+        self._render_output(cairo.Context(surface), mon, is_hover,
+                            is_selected, selected_leaf_idx, label_font_px)
+        self._output_surfaces[name] = (key, surface)
+        return surface
+
+    def _render_output(self, context, mon, is_hover, is_selected,
+                       selected_leaf_idx, label_font_px):
+        """Draw one monitor tile with its top-left corner at the origin."""
+        fac = self.factor
+        colors = self._theme_colors
+        name = mon['name']
+        rect = (0, 0, mon['w'], mon['h'])
+        center = rect[2] / 2, rect[3] / 2
+
+        # ~6px on-screen corner radius, capped for tiny tiles
+        radius = min(6 * fac, min(rect[2], rect[3]) * 0.1)
+
+        # Fill
+        bg = colors['bg_hover'] if is_hover else colors['bg']
+        _append_rounded_rect(context, rect[0], rect[1], rect[2], rect[3],
+                             radius)
+        context.set_source_rgba(*bg)
+        context.fill()
 
-            # Split overlay
-            splits = mon['splits']
-            border = mon['border']
-            if splits:
-                # Determine selected leaf for this monitor (if any)
-                selected_leaf_idx = None
-                sel = self._selected_output
-                if sel:
-                    sel_phys, sel_leaf = self.parse_virtual_name(sel)
-                    if sel_phys == name and sel_leaf is not None:
-                        selected_leaf_idx = sel_leaf
-                self._draw_split_overlay(
-                    context, splits,
-                    rect[0], rect[1], rect[2], rect[3],
-                    border,
-                    selected_leaf_idx=selected_leaf_idx,
-                )
-            elif border > 0:
-                # Unsplit output with border — show inset region
-                bx_frac = border / mon['w'] if mon['w'] > 0 else 0
-                by_frac = border / mon['h'] if mon['h'] > 0 else 0
-                px = rect[0] + bx_frac * rect[2]
-                py = rect[1] + by_frac * rect[3]
-                pw = max(rect[2] * (1 - 2 * bx_frac), 0)
-                ph = max(rect[3] * (1 - 2 * by_frac), 0)
-                context.set_source_rgba(0.4, 0.7, 0.4, 0.2)
-                context.rectangle(px, py, pw, ph)
+        # Screenshot thumbnail — near-opaque: on hardware without
+        # usable EDID names the content is the primary
+        # which-monitor-is-which signal.
+        if name in self._screenshots:
+            shot = self._screenshots[name]
+            context.save()
+            _append_rounded_rect(context, rect[0], rect[1],
+                                 rect[2], rect[3], radius)
+            context.clip()
+            sx = rect[2] / shot.get_width()
+            sy = rect[3] / shot.get_height()
+            context.translate(rect[0], rect[1])
+            context.scale(sx, sy)
+            context.set_source_surface(shot, 0, 0)
+            context.paint_with_alpha(0.8)
+            context.restore()
+            if is_hover:
+                _append_rounded_rect(context, rect[0], rect[1],
+                                     rect[2], rect[3], radius)
+                context.set_source_rgba(1, 1, 1, 0.08)
                 context.fill()
-                context.set_source_rgba(0.4, 0.7, 0.4, 0.5)
-                context.set_line_width(1 * fac)
-                context.set_dash([4 * fac, 3 * fac])
-                context.rectangle(px, py, pw, ph)
-                context.stroke()
-                context.set_dash([])
 
-            # Name pill — uniform font, ellipsized to fit the tile so it
-            # never spills past the edges into neighbouring tiles.
-            context.save()
+        # Border stroke: accent ring when selected, hairline otherwise.
+        # Read-only panes (thumbnails) get a thinner mirror-selection
+        # ring so it reads as a hint, not a frame.
+        _append_rounded_rect(context, rect[0], rect[1], rect[2], rect[3],
+                             radius)
+        if is_selected:
+            context.set_source_rgba(*colors['accent'])
+            context.set_line_width((1 if self._readonly else 2) * fac)
+        else:
+            context.set_source_rgba(*colors['border'])
+            context.set_line_width(1 * fac)
+        context.stroke()
+
+        # Split overlay
+        splits = mon['splits']
+        border = mon['border']
+        if splits:
+            self._draw_split_overlay(
+                context, splits,
+                rect[0], rect[1], rect[2], rect[3],
+                border,
+                selected_leaf_idx=selected_leaf_idx,
+            )
+        elif border > 0:
+            # Unsplit output with border — show inset region
+            bx_frac = border / mon['w'] if mon['w'] > 0 else 0
+            by_frac = border / mon['h'] if mon['h'] > 0 else 0
+            px = rect[0] + bx_frac * rect[2]
+            py = rect[1] + by_frac * rect[3]
+            pw = max(rect[2] * (1 - 2 * bx_frac), 0)
+            ph = max(rect[3] * (1 - 2 * by_frac), 0)
+            context.set_source_rgba(0.4, 0.7, 0.4, 0.2)
+            context.rectangle(px, py, pw, ph)
+            context.fill()
+            context.set_source_rgba(0.4, 0.7, 0.4, 0.5)
+            context.set_line_width(1 * fac)
+            context.set_dash([4 * fac, 3 * fac])
+            context.rectangle(px, py, pw, ph)
+            context.stroke()
+            context.set_dash([])
 
-            rotation = mon['rotation']
-            is_odd_rotation = rotation and rotation.is_odd
-            along = rect[3] if is_odd_rotation else rect[2]  # text baseline runs here
-            textheight = label_font_px
+        # Name pill — uniform font, ellipsized to fit the tile so it
+        # never spills past the edges into neighbouring tiles.
+        context.save()
 
-            newdescr = Pango.FontDescription("sans bold")
-            newdescr.set_absolute_size(textheight * Pango.SCALE)
+        rotation = mon['rotation']
+        is_odd_rotation = rotation and rotation.is_odd
+        along = rect[3] if is_odd_rotation else rect[2]  # text baseline runs here
+        textheight = label_font_px
+
+        pad_x = textheight * 0.5
+        pad_y = textheight * 0.28
+        # Available text width inside the tile, leaving a margin so
+        # the pill has breathing room from the tile border.
+        max_text_w = max(along - 4 * pad_x, textheight)
+
+        label_key = (name, textheight, mon['primary'], max_text_w)
+        label = self._label_cache.get(label_key)
+        if label is None:
+            if self._label_font[0] != textheight:
+                newdescr = Pango.FontDescription("sans bold")
+                newdescr.set_absolute_size(textheight * Pango.SCALE)
+                self._label_font = (textheight, newdescr)
 
-            name_markup = GLib.markup_escape_text(name)
-            if mon['primary']:
-                name_markup = "<u>%s</u>" % name_markup
             layout = PangoCairo.create_layout(context)
-            layout.set_font_description(newdescr)
-            layout.set_markup(name_markup, -1)
-
-            pad_x = textheight * 0.5
-            pad_y = textheight * 0.28
-            # Available text width inside the tile, leaving a margin so
-            # the pill has breathing room from the tile border.
-            max_text_w = max(along - 4 * pad_x, textheight)
+            layout.set_font_description(self._label_font[1])
+            # Only the primary's underline needs markup; plain names skip
+            # the escape and the markup parse.
+            if mon['primary']:
+                layout.set_markup(
+                    "<u>%s</u>" % GLib.markup_escape_text(name), -1)
+            else:
+                layout.set_text(name, -1)
+
             nat_w, nat_h = layout.get_pixel_size()
             if nat_w > max_text_w:
                 layout.set_ellipsize(Pango.EllipsizeMode.END)
@@ -836,24 +1030,26 @@ class MonitorWidget(Gtk.DrawingArea):
                 draw_w = max_text_w
             else:
                 draw_w = nat_w
+            label = self._label_cache[label_key] = (layout, draw_w, nat_h)
+        layout, draw_w, nat_h = label
+
+        # Pill centered on the tile, handling rotation
+        context.translate(*center)
+        if rotation:
+            context.rotate(rotation.angle)
+
+        pill_w = draw_w + 2 * pad_x
+        pill_h = nat_h + 2 * pad_y
+        _rounded_rect(context, -pill_w / 2, -pill_h / 2,
+                      pill_w, pill_h, pill_h / 2)
+        context.set_source_rgba(*colors['pill_bg'])
+        context.fill()
 
-            # Pill centered on the tile, handling rotation
-            context.translate(*center)
-            if rotation:
-                context.rotate(rotation.angle)
-
-            pill_w = draw_w + 2 * pad_x
-            pill_h = nat_h + 2 * pad_y
-            _rounded_rect(context, -pill_w / 2, -pill_h / 2,
-                          pill_w, pill_h, pill_h / 2)
-            context.set_source_rgba(*colors['pill_bg'])
-            context.fill()
-
-            context.move_to(-draw_w / 2, -nat_h / 2)
-            context.set_source_rgba(*colors['pill_fg'])
-            PangoCairo.show_layout(context, layout)
+        context.move_to(-draw_w / 2, -nat_h / 2)
+        context.set_source_rgba(*colors['pill_fg'])
+        PangoCairo.show_layout(context, layout)
 
-            context.restore()
+        context.restore()
 
     def _draw_split_overlay(self, context, tree, x, y, w, h, border=0,
                             selected_leaf_idx=None):
@@ -863,14 +1059,22 @@ class MonitorWidget(Gtk.DrawingArea):
         1/factor), so on-screen widths scale by self.factor."""
         fac = self.factor
         accent = self._theme_colors['accent']
-        regions = list(tree.leaf_regions_proportional())
-        leaves = [leaf for _, leaf in tree.iter_leaves()]
+        n_colors = len(SPLIT_COLORS)
         # Compute border as proportion of monitor dimensions
         bx_frac = border / w if w > 0 else 0
         by_frac = border / h if h > 0 else 0
-        for i, (rx, ry, rw, rh) in enumerate(regions):
-            ci = i % len(SPLIT_COLORS)
-            color = SPLIT_COLORS[ci]
+        # The dashed outlines share one dash pattern; the selected ring
+        # and primary badges are solid and drawn after the loop.
+        selected_rect = None
+        primary_rects = []
+        context.set_line_width(1.2 * fac)
+        context.set_dash([5 * fac, 3 * fac])
+        # Bound once: the loop below runs per leaf for every tile recorded.
+        set_source = context.set_source_rgba
+        rectangle = context.rectangle
+        for i, ((rx, ry, rw, rh), leaf) in enumerate(
+                tree.proportional_leaves()):
+            r, g, b = SPLIT_COLORS[i % n_colors]
 
             # Apply border inset (proportional)
             if border > 0:
@@ -884,47 +1088,77 @@ class MonitorWidget(Gtk.DrawingArea):
             pw = rw * w
             ph = rh * h
 
-            context.set_source_rgba(*color, 0.25)
-            context.rectangle(px, py, pw, ph)
+            set_source(r, g, b, 0.25)
+            rectangle(px, py, pw, ph)
             context.fill()
 
-            is_selected = (i == selected_leaf_idx)
-            is_primary = (i < len(leaves) and leaves[i].primary)
-
             # Border: accent ring if selected, dashed colored otherwise.
             # Solid-while-dragging comes for free: the drag updates the
             # node proportion and the dragged leaf is the selected one.
-            if is_selected:
-                context.set_source_rgba(*accent)
-                context.set_line_width(2 * fac)
-                context.rectangle(px, py, pw, ph)
-                context.stroke()
+            if i == selected_leaf_idx:
+                selected_rect = (px, py, pw, ph)
             else:
-                context.set_source_rgba(*color, 0.7)
-                context.set_line_width(1.2 * fac)
-                context.set_dash([5 * fac, 3 * fac])
-                context.rectangle(px, py, pw, ph)
+                set_source(r, g, b, 0.7)
+                rectangle(px, py, pw, ph)
                 context.stroke()
-                context.set_dash([])
 
-            # Primary marker: solid yellow corner badge (~10px on screen)
-            badge = 10 * fac
-            if is_primary and pw > badge * 1.5 and ph > badge * 1.5:
+            if leaf.primary:
+                primary_rects.append((px, py, pw, ph))
+        context.set_dash([])
+
+        if selected_rect is not None:
+            context.set_source_rgba(*accent)
+            context.set_line_width(2 * fac)
+            context.rectangle(*selected_rect)
+            context.stroke()
+
+        # Primary marker: solid yellow corner badge (~10px on screen)
+        badge = 10 * fac
+        context.set_line_width(1 * fac)
+        for px, py, pw, ph in primary_rects:
+            if pw > badge * 1.5 and ph > badge * 1.5:
                 context.set_source_rgba(1.0, 0.85, 0.0, 0.9)
                 context.rectangle(px + 5 * fac, py + 5 * fac, badge, badge)
                 context.fill()
                 context.set_source_rgba(0, 0, 0, 0.7)
-                context.set_line_width(1 * fac)
                 context.rectangle(px + 5 * fac, py + 5 * fac, badge, badge)
                 context.stroke()
 
     def _force_repaint(self):
+        # Coalesce bursts of repaint requests (a drag or a hover sweep
+        # asks for one per pointer event) into one queue_draw per idle.
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            GLib.idle_add(self._do_repaint)
+
+    def _do_repaint(self):
+        self._redraw_pending = False
         self.queue_draw()
+        return False
+
+    def _repaint_output(self, name):
+        """Queue a redraw of just one monitor tile. name may be a virtual
+        like 'DP-5~2', which repaints its parent's tile."""
+        if name is None:
+            return
+        phys = self.parse_virtual_name(name)[0]
+        fac = self.factor
+        for rect_name, x0, y0, x1, y1 in self._hit_rects:
+            if rect_name == phys:
+                # Round outward and leave room for the selection ring,
+                # which is stroked across the tile edge.
+                left = int(x0 // fac) - 2
+                top = int(y0 // fac) - 2
+                right = int(-(-x1 // fac)) + 2
+                bottom = int(-(-y1 // fac)) + 2
+                self.queue_draw_area(left, top, right - left, bottom - top)
+                return
 
     #################### click handling ####################
 
     def click(self, _widget, event):
-        undermouse = self._get_point_outputs(event.x, event.y)
+        # Topmost output under the pointer, or None over empty canvas.
+        undermouse = self._get_point_topmost_output(event.x, event.y)
         if event.button == 1:
             # If the click landed on a split line, start a resize drag.
             # Returning True consumes the press so GTK's default handler
@@ -933,13 +1167,17 @@ class MonitorWidget(Gtk.DrawingArea):
             if line:
                 self._split_drag = line
                 self._lastclick = (event.x, event.y)
+                # Track every pointer position of the resize; the
+                # repaints stay coalesced in _force_repaint.
+                self.get_window().set_event_compression(False)
                 return True
         if event.button == 1 and undermouse:
-            which = self._get_point_active_output(event.x, event.y)
+            which = undermouse
             # Bring clicked monitor to top of draw order
             for i, m in enumerate(self._monitors):
                 if m['name'] == which:
                     self._monitors.append(self._monitors.pop(i))
+                    self._rebuild_hit_rects()
                     break
 
             # If the click is inside a split sub-region, select that virtual
@@ -951,8 +1189,7 @@ class MonitorWidget(Gtk.DrawingArea):
             self.selected_output = None
         if event.button == 3:
             if undermouse:
-                target = [m['name'] for m in self._monitors
-                          if m['name'] in undermouse][-1]
+                target = undermouse
                 # If the right-click landed inside a virtual sub-region,
                 # target that specific leaf so the menu's Primary toggle
                 # operates per-leaf instead of on the parent monitor.
@@ -967,18 +1204,20 @@ class MonitorWidget(Gtk.DrawingArea):
 
         self._lastclick = (event.x, event.y)
 
-    def _get_point_outputs(self, x, y):
-        x, y = x * self.factor, y * self.factor
-        return {m['name'] for m in self._monitors
-                if m['x'] - self.factor <= x <= m['x'] + m['w'] + self.factor
-                and m['y'] - self.factor <= y <= m['y'] + m['h'] + self.factor}
+    def _get_point_topmost_output(self, x, y):
+        """Name of the topmost output at (x, y) (last in _monitors
+        order), or None."""
+        fac = self.factor
+        x, y = x * fac, y * fac
+        for name, x0, y0, x1, y1 in reversed(self._hit_boxes()):
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                return name
+        return None
 
     def _get_point_active_output(self, x, y):
-        undermouse = self._get_point_outputs(x, y)
-        if not undermouse:
+        active = self._get_point_topmost_output(x, y)
+        if active is None:
             raise IndexError("No output here.")
-        # Topmost in _monitors list order
-        active = [m['name'] for m in self._monitors if m['name'] in undermouse][-1]
         return active
 
     #################### context menu ####################
@@ -990,7 +1229,7 @@ class MonitorWidget(Gtk.DrawingArea):
             output_state = self._xrandr.state.outputs[output_name]
 
             i = Gtk.MenuItem(output_name)
-            i.props.submenu = self._contextmenu(output_name)
+            self._lazy_submenu(i, self._contextmenu, output_name)
             menu.add(i)
 
             if not output_config.active and not output_state.connected:
@@ -998,14 +1237,28 @@ class MonitorWidget(Gtk.DrawingArea):
         menu.show_all()
         return menu
 
-    def _contextmenu(self, output_name):
+    @staticmethod
+    def _lazy_submenu(item, fill, *args):
+        """Give item an empty submenu that fill(*args, menu=...) populates
+        the first time the item is selected, so menus only build the
+        branches the user actually opens."""
+        item.props.submenu = Gtk.Menu()
+
+        def _on_select(item):
+            submenu = item.get_submenu()
+            if not submenu.get_children():
+                fill(*args, menu=submenu)
+                submenu.show_all()
+        item.connect('select', _on_select)
+
+    def _contextmenu(self, output_name, menu=None):
         # output_name may be a virtual like "DP-5~2"; resolve to the
         # physical parent for most operations but track leaf_idx so the
         # Primary checkbox can target the specific leaf.
         phys_name, leaf_idx = self.parse_virtual_name(output_name)
-        menu = Gtk.Menu()
+        if menu is None:
+            menu = Gtk.Menu()
         output_config = self._xrandr.configuration.outputs[phys_name]
-        output_state = self._xrandr.state.outputs[phys_name]
 
         if leaf_idx is not None:
             header = Gtk.MenuItem(label=output_name)
@@ -1015,8 +1268,7 @@ class MonitorWidget(Gtk.DrawingArea):
 
         enabled = Gtk.CheckMenuItem(_("Active"))
         enabled.props.active = output_config.active
-        enabled.connect('activate', lambda menuitem: self.set_active(
-            phys_name, menuitem.props.active))
+        enabled.connect('activate', self._on_active_toggled, phys_name)
 
         menu.add(enabled)
 
@@ -1025,58 +1277,19 @@ class MonitorWidget(Gtk.DrawingArea):
                 primary = Gtk.CheckMenuItem(_("Primary"))
                 if leaf_idx is None:
                     primary.props.active = output_config.primary
-                    primary.connect('activate', lambda menuitem: self.set_primary(
-                        phys_name, menuitem.props.active))
                 else:
                     tree = self._xrandr.configuration.splits.get(phys_name)
                     leaf_primary = (output_config.primary and tree is not None
                                     and tree.primary_leaf_index() == leaf_idx)
                     primary.props.active = leaf_primary
-                    def _toggle_leaf_primary(menuitem, _phys=phys_name, _leaf=leaf_idx):
-                        active = menuitem.props.active
-                        self.set_primary(_phys, active,
-                                         leaf_idx=_leaf if active else None)
-                    primary.connect('activate', _toggle_leaf_primary)
+                primary.connect('activate', self._on_primary_toggled,
+                                phys_name, leaf_idx)
                 menu.add(primary)
 
-            res_m = Gtk.Menu()
-            for mode in output_state.modes:
-                i = Gtk.CheckMenuItem(str(mode))
-                i.props.draw_as_radio = True
-                i.props.active = (output_config.mode.name == mode.name)
-
-                def _res_set(_menuitem, output_name, mode):
-                    try:
-                        self.set_resolution(output_name, mode)
-                    except InadequateConfiguration as exc:
-                        self.error_message(
-                            _("Setting this resolution is not possible here: %s") % exc
-                        )
-                i.connect('activate', _res_set, phys_name, mode)
-                res_m.add(i)
-
-            or_m = Gtk.Menu()
-            for rotation in ROTATIONS:
-                i = Gtk.CheckMenuItem("%s" % rotation)
-                i.props.draw_as_radio = True
-                i.props.active = (output_config.rotation == rotation)
-
-                def _rot_set(_menuitem, output_name, rotation):
-                    try:
-                        self.set_rotation(output_name, rotation)
-                    except InadequateConfiguration as exc:
-                        self.error_message(
-                            _("This orientation is not possible here: %s") % exc
-                        )
-                i.connect('activate', _rot_set, phys_name, rotation)
-                if rotation not in output_state.rotations:
-                    i.props.sensitive = False
-                or_m.add(i)
-
             res_i = Gtk.MenuItem(_("Resolution"))
-            res_i.props.submenu = res_m
+            self._lazy_submenu(res_i, self._resolution_menu, phys_name)
             or_i = Gtk.MenuItem(_("Orientation"))
-            or_i.props.submenu = or_m
+            self._lazy_submenu(or_i, self._rotation_menu, phys_name)
 
             menu.add(res_i)
             menu.add(or_i)
@@ -1096,6 +1309,55 @@ class MonitorWidget(Gtk.DrawingArea):
         menu.show_all()
         return menu
 
+    def _resolution_menu(self, phys_name, menu):
+        output_config = self._xrandr.configuration.outputs[phys_name]
+        for mode in self._xrandr.state.outputs[phys_name].modes:
+            i = Gtk.CheckMenuItem(str(mode))
+            i.props.draw_as_radio = True
+            i.props.active = (output_config.mode.name == mode.name)
+            i.connect('activate', self._on_mode_activate, phys_name, mode)
+            menu.add(i)
+
+    def _rotation_menu(self, phys_name, menu):
+        output_config = self._xrandr.configuration.outputs[phys_name]
+        output_state = self._xrandr.state.outputs[phys_name]
+        for rotation in ROTATIONS:
+            i = Gtk.CheckMenuItem("%s" % rotation)
+            i.props.draw_as_radio = True
+            i.props.active = (output_config.rotation == rotation)
+            i.connect('activate', self._on_rotation_activate, phys_name,
+                      rotation)
+            if rotation not in output_state.rotations:
+                i.props.sensitive = False
+            menu.add(i)
+
+    # Menu handlers take their target as connect() user data, so building
+    # a menu doesn't allocate a closure per item.
+
+    def _on_active_toggled(self, menuitem, output_name):
+        self.set_active(output_name, menuitem.props.active)
+
+    def _on_primary_toggled(self, menuitem, output_name, leaf_idx):
+        active = menuitem.props.active
+        self.set_primary(output_name, active,
+                         leaf_idx=leaf_idx if active else None)
+
+    def _on_mode_activate(self, _menuitem, output_name, mode):
+        try:
+            self.set_resolution(output_name, mode)
+        except InadequateConfiguration as exc:
+            self.error_message(
+                _("Setting this resolution is not possible here: %s") % exc
+            )
+
+    def _on_rotation_activate(self, _menuitem, output_name, rotation):
+        try:
+            self.set_rotation(output_name, rotation)
+        except InadequateConfiguration as exc:
+            self.error_message(
+                _("This orientation is not possible here: %s") % exc
+            )
+
     def _on_split_monitor(self, menuitem, output_name):
         output_config = self._xrandr.configuration.outputs[output_name]
         existing_tree = self._xrandr.configuration.splits.get(output_name)
@@ -1188,11 +1450,17 @@ class MonitorWidget(Gtk.DrawingArea):
         oldpos = self._xrandr.configuration.outputs[self._draggingoutput].position
         newpos = Position(
             (oldpos[0] + self.factor * rel[0], oldpos[1] + self.factor * rel[1]))
+        extent = self._monitors_extent()
+        self._repaint_output(self._draggingoutput)
         self._xrandr.configuration.outputs[
             self._draggingoutput
         ].tentative_position = self._draggingsnap.suggest(newpos)
         self._sync_monitors()
-        self._force_repaint()
+        if self._monitors_extent() != extent:
+            # The work-area backdrop grew or shrank with the move.
+            self._force_repaint()
+        else:
+            self._repaint_output(self._draggingoutput)
 
         return True
 
@@ -32,6 +32,8 @@ class XRandR(XRandRInvokeMixin, XRandRLoadMixin, XRandRSaveMixin):
 
     def __init__(self, display=None, force_version=False):
         self.environ = dict(os.environ)
+        # args -> (start time, Popen) for _prefetch_queries
+        self._inflight_queries = {}
         if display:
             self.environ['DISPLAY'] = display
 
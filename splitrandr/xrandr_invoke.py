@@ -20,6 +20,37 @@ import logging
 
 log = logging.getLogger('splitrandr')
 
+# An "EDID:" property line plus the hex rows under it, as one match;
+# the hex is ''.join(m.group('edid').split()).
+_EDID_BLOCK = r'\t[ \t]*EDID:[ \t]*(?P<edid>(?:\n\t[ \t]*[0-9a-f]+[ \t]*)*)'
+# Output headlines and EDID blocks of `xrandr --verbose`; everything
+# else is skipped by finditer.
+_EDID_SWEEP_RE = re.compile(r'^(?:(?P<head>\S[^\n]*)|' + _EDID_BLOCK + r')$', re.M)
+_GEOMETRY_RE = re.compile(r'(\d+)x(\d+)\+(\d+)\+(\d+)')
+
+# Read-only query results shared by every XRandR instance:
+# (DISPLAY, args) -> (time.monotonic() of the query, output text).
+# Startup loads the Current and Proposed panes back to back, and a save
+# re-reads state right after probing it; within QUERY_TTL seconds those
+# reuse the same xrandr run. Every path that changes X state clears it:
+# the _run* helpers here, load_from_x(probe=True), save_to_x, the
+# revert scripts (gui_app_apply and tray) and the hotplug handler in
+# gui_screen_watcher. Anything new that changes X outside _run* must
+# call invalidate_query_cache() too.
+QUERY_TTL = 0.5
+_query_cache = {}
+
+# Seconds before a read-only query or an ignore-error call is given up
+# on. Calls that change X state get no limit: a modeset can legitimately
+# stall for seconds on nvidia / DP hubs, and killing xrandr partway
+# through would leave the layout half-applied.
+QUERY_TIMEOUT = 10
+
+
+def invalidate_query_cache():
+    """Forget cached xrandr query output, e.g. after a hotplug event."""
+    _query_cache.clear()
+
 
 class XRandRInvokeMixin:
 
@@ -40,15 +71,25 @@ class XRandRInvokeMixin:
         env.pop('LD_PRELOAD', None)
         return env
 
-    def _output(self, *args):
+    def _start_query(self, args):
         log.info("xrandr %s", " ".join(args))
-        proc = subprocess.Popen(
+        return subprocess.Popen(
             ("xrandr",) + args,
             stdout=subprocess.PIPE, stderr=subprocess.PIPE,
             env=self._xrandr_env(),
         )
-        ret, err = proc.communicate()
-        status = proc.wait()
+
+    def _finish_query(self, proc):
+        try:
+            ret, err = proc.communicate(timeout=QUERY_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            # Same as subprocess.run(timeout=...): kill, reap, re-raise.
+            proc.kill()
+            proc.communicate()
+            raise
+        return self._query_text(proc.returncode, ret, err)
+
+    def _query_text(self, status, ret, err):
         if status != 0:
             log.error("xrandr exit %d stderr: %s", status, err.decode('utf-8', errors='replace'))
             raise Exception("XRandR returned error code %d: %s" %
@@ -59,110 +100,167 @@ class XRandRInvokeMixin:
                 "XRandR wrote to stderr, but did not report an error (Message was: %r)" % err)
         return ret.decode('utf-8')
 
+    def _spawn(self, args, stdout=subprocess.PIPE, timeout=None):
+        """Run xrandr with `args` to completion, capturing stderr (and
+        stdout, unless the caller passes e.g. subprocess.DEVNULL)."""
+        return subprocess.run(
+            ("xrandr",) + args,
+            stdout=stdout, stderr=subprocess.PIPE, check=False,
+            timeout=timeout, env=self._xrandr_env(),
+        )
+
+    def _output(self, *args, timeout=QUERY_TIMEOUT):
+        log.info("xrandr %s", " ".join(args))
+        proc = self._spawn(args, timeout=timeout)
+        return self._query_text(proc.returncode, proc.stdout, proc.stderr)
+
+    def _prefetch_queries(self, *queries):
+        """Start xrandr for every query (an args tuple) not already cached,
+        all at once, so their run times overlap. The next _output_cached()
+        for each query collects the result (and raises its error, if any)."""
+        inflight = self._inflight_queries
+        display = self.environ.get('DISPLAY')
+        now = time.monotonic()
+        for args in queries:
+            hit = _query_cache.get((display, args))
+            if args in inflight or (hit is not None and now - hit[0] < QUERY_TTL):
+                continue
+            inflight[args] = (now, self._start_query(args))
+
+    def _discard_inflight_queries(self):
+        """Kill and reap prefetched queries that nobody collected."""
+        inflight = self._inflight_queries
+        while inflight:
+            _args, (_started, proc) = inflight.popitem()
+            if proc.poll() is None:
+                proc.kill()
+            proc.communicate()
+
+    def _output_cached(self, *args):
+        """_output() for read-only queries, reusing a result younger than
+        QUERY_TTL seconds from any XRandR on the same display."""
+        key = (self.environ.get('DISPLAY'), args)
+        pending = self._inflight_queries.pop(args, None)
+        if pending is not None:
+            started, proc = pending
+            text = self._finish_query(proc)
+            _query_cache[key] = (started, text)
+            return text
+        now = time.monotonic()
+        hit = _query_cache.get(key)
+        if hit is not None and now - hit[0] < QUERY_TTL:
+            return hit[1]
+        text = self._output(*args)
+        _query_cache[key] = (now, text)
+        return text
+
     def _run(self, *args):
-        self._output(*args)
+        invalidate_query_cache()
+        self._output(*args, timeout=None)
 
     def _run_ignore_error(self, *args):
         """Run xrandr, ignoring errors (used for --delmonitor which may fail)."""
+        invalidate_query_cache()
         log.info("xrandr (ignore-error) %s", " ".join(args))
-        proc = subprocess.Popen(
-            ("xrandr",) + args,
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            env=self._xrandr_env(),
-        )
-        out, err = proc.communicate()
-        status = proc.wait()
-        if status != 0:
-            log.warning("xrandr (ignored) exit %d stderr: %s", status, err.decode('utf-8', errors='replace'))
+        try:
+            proc = self._spawn(args, stdout=subprocess.DEVNULL,
+                               timeout=QUERY_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            log.warning("xrandr (ignored) timed out")
+            return
+        if proc.returncode != 0:
+            log.warning("xrandr (ignored) exit %d stderr: %s", proc.returncode,
+                        proc.stderr.decode('utf-8', errors='replace'))
 
     def _run_no_preload(self, *args):
         """Alias for _run; LD_PRELOAD is now stripped for ALL xrandr calls."""
+        invalidate_query_cache()
         log.info("xrandr (no-preload) %s", " ".join(args))
-        proc = subprocess.Popen(
-            ("xrandr",) + args,
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            env=self._xrandr_env(),
-        )
-        out, err = proc.communicate()
-        status = proc.wait()
-        if status != 0:
-            log.error("xrandr (no-preload) exit %d stderr: %s", status, err.decode('utf-8', errors='replace'))
-            raise Exception("XRandR returned error code %d: %s" % (status, err))
+        proc = self._spawn(args)
+        if proc.returncode != 0:
+            log.error("xrandr (no-preload) exit %d stderr: %s", proc.returncode,
+                      proc.stderr.decode('utf-8', errors='replace'))
+            raise Exception("XRandR returned error code %d: %s" % (proc.returncode, proc.stderr))
 
     def _refresh_edids(self):
         """Re-read EDIDs from the X server and update state.
 
+        Uses `--current` so xrandr reports what the server already knows
+        instead of re-polling every output.
+
         `xrandr --verbose` runs unhooked because `_xrandr_env()` strips
         LD_PRELOAD, so real physical outputs and their EDIDs are always
         visible regardless of whether fakexrandr.bin is present.
         Earlier versions required the bin to be rm'd first; that's no
         longer necessary.
+
+        Only outputs without an EDID are filled in, so when every
+        connected output already has one there is nothing to query.
         """
+        if all(o.edid_hex for o in self.state.outputs.values() if o.connected):
+            return
         try:
-            verbose = self._output("--verbose")
+            verbose = self._output_cached("--current", "--verbose")
         except Exception:
             return
         current_output = None
-        in_edid = False
-        edid_lines = []
-        for line in verbose.split('\n'):
-            if not line.startswith(('\t', ' ')):
-                # Flush pending EDID
-                if in_edid and current_output and edid_lines:
-                    edid_hex = ''.join(edid_lines)
-                    out_state = self.state.outputs.get(current_output)
-                    if out_state and not out_state.edid_hex:
-                        out_state.edid_hex = edid_hex
-                in_edid = False
-                edid_lines = []
-                # Parse output name from headline
-                parts = line.split()
+        for m in _EDID_SWEEP_RE.finditer(verbose):
+            if m.lastgroup == 'head':
+                parts = m.group('head').split()
                 if len(parts) >= 2 and parts[1] in ('connected', 'disconnected', 'unknown'):
                     current_output = parts[0]
                 else:
                     current_output = None
-            elif line.startswith('\t'):
-                stripped = line.strip()
-                if stripped == 'EDID:':
-                    in_edid = True
-                    edid_lines = []
-                elif in_edid:
-                    if re.match(r'^[0-9a-f]+$', stripped):
-                        edid_lines.append(stripped)
-                    else:
-                        if current_output and edid_lines:
-                            edid_hex = ''.join(edid_lines)
-                            out_state = self.state.outputs.get(current_output)
-                            if out_state and not out_state.edid_hex:
-                                out_state.edid_hex = edid_hex
-                        in_edid = False
-                        edid_lines = []
-        # Flush final EDID
-        if in_edid and current_output and edid_lines:
-            edid_hex = ''.join(edid_lines)
-            out_state = self.state.outputs.get(current_output)
-            if out_state and not out_state.edid_hex:
-                out_state.edid_hex = edid_hex
+            elif current_output:
+                edid_hex = ''.join(m.group('edid').split())
+                out_state = self.state.outputs.get(current_output)
+                if edid_hex and out_state and not out_state.edid_hex:
+                    out_state.edid_hex = edid_hex
 
     def _run_no_preload_ignore_error(self, *args):
         """Alias for _run_ignore_error; LD_PRELOAD is now stripped for ALL xrandr calls."""
+        invalidate_query_cache()
         log.info("xrandr (no-preload, ignore-error) %s", " ".join(args))
-        proc = subprocess.Popen(
-            ("xrandr",) + args,
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            env=self._xrandr_env(),
-        )
-        out, err = proc.communicate()
-        status = proc.wait()
-        if status != 0:
-            log.warning("xrandr (no-preload, ignored) exit %d stderr: %s", status, err.decode('utf-8', errors='replace'))
+        try:
+            proc = self._spawn(args, stdout=subprocess.DEVNULL,
+                               timeout=QUERY_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            log.warning("xrandr (no-preload, ignored) timed out")
+            return False
+        if proc.returncode != 0:
+            log.warning("xrandr (no-preload, ignored) exit %d stderr: %s", proc.returncode,
+                        proc.stderr.decode('utf-8', errors='replace'))
+            return False
+        return True
+
+    def _run_batch_ignore_error(self, actions, batch_size=32):
+        """Run xrandr actions (arg tuples, e.g. ("--delmonitor", name))
+        batch_size at a time in one invocation each, ignoring errors.
+
+        xrandr stops at the first failing action, so a batch that fails
+        is retried one action at a time and a single bad action still
+        can't take the others down with it.
+        """
+        for i in range(0, len(actions), batch_size):
+            chunk = actions[i:i + batch_size]
+            args = [arg for action in chunk for arg in action]
+            if self._run_no_preload_ignore_error(*args) or len(chunk) == 1:
+                continue
+            for action in chunk:
+                self._run_no_preload_ignore_error(*action)
 
     def _query_output_positions(self):
-        """Query xrandr for current output positions. Returns {name: (x, y)} for active outputs."""
+        """Query xrandr for current output positions. Returns {name: (x, y)} for active outputs.
+
+        Only ever used to verify a layout we just applied, so `--current`
+        reads the server's state without re-probing every output (which
+        can stall X for up to seconds on DP hubs / nvidia), and the
+        query cache is bypassed since positions may still be settling.
+        """
         positions = {}
         try:
-            output = self._output("--query")
-            for line in output.split('\n'):
+            output = self._output("--query", "--current")
+            for line in output.splitlines():
                 if line.startswith(('\t', ' ', 'Screen')):
                     continue
                 parts = line.split()
@@ -171,15 +269,15 @@ class XRandRInvokeMixin:
                 name = parts[0]
                 # Find geometry (WxH+X+Y)
                 for p in parts[2:]:
-                    m = re.match(r'\d+x\d+\+(\d+)\+(\d+)', p)
+                    m = _GEOMETRY_RE.match(p)
                     if m:
-                        positions[name] = (int(m.group(1)), int(m.group(2)))
+                        positions[name] = (int(m.group(3)), int(m.group(4)))
                         break
         except Exception as e:
             log.warning("failed to query output positions: %s", e)
         return positions
 
-    def _verify_and_correct_positions(self, max_attempts=3, delay=0.5):
+    def _verify_and_correct_positions(self, max_attempts=3, delay=0.5, cli_args=None):
         """Verify output positions match configuration, re-apply if not.
 
         The nvidia driver processes mode changes asynchronously.  Even after
@@ -206,7 +304,9 @@ class XRandRInvokeMixin:
                 log.warning("position mismatch for %s: expected %s, got %s (attempt %d)",
                            name, expected, actual, attempt + 1)
             log.info("re-applying xrandr config to correct positions")
-            self._run(*self.configuration.commandlineargs())
+            if cli_args is None:
+                cli_args = self.configuration.commandlineargs()
+            self._run(*cli_args)
         # Final check
         current = self._query_output_positions()
         for name, out_cfg in self.configuration.outputs.items():
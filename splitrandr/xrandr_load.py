@@ -14,18 +14,46 @@ import os
 import re
 import warnings
 import logging
-from functools import reduce
 
 from .auxiliary import Size, Geometry, NamedSize, Rotation, ROTATIONS, NORMAL
 from .splits import SplitTree
 from .xrandr_types import Feature
+from .xrandr_invoke import invalidate_query_cache, _EDID_BLOCK
 
 log = logging.getLogger('splitrandr')
 
+# One alternative per kind of `xrandr --verbose` line, tried in order,
+# so _load_raw_lines classifies the whole dump in a single sweep:
+# tab-indented lines are properties (an EDID block, taken whole with
+# its hex rows, or anything else), two-space lines are modes or their
+# h:/v: timing rows, and every other line starts a new output.
+_VERBOSE_LINE_RE = re.compile(
+    r'^(?:(?P<screen>Screen [^\n]*)'
+    r'|' + _EDID_BLOCK +
+    r'|(?P<prop>\t[^\n]*)'
+    r'|  [ \t]*(?P<hv>[hv]:[^\n]*)'
+    r'|  (?P<mode>[^\n]*)'
+    r'|(?P<head>[^\n]*))$', re.M)
+
+_CONNECTION_STATES = frozenset(('connected', 'disconnected', 'unknown-connection'))
+_CONNECTED_STATES = frozenset(('connected', 'unknown-connection'))
+_ROTATION_NAMES = frozenset(ROTATIONS)
+
+_MM_RE = re.compile(r'(\d+)mm\s+x\s+(\d+)mm')
+_RATE_RE = re.compile(r'clock\s+([\d.]+)\s*Hz')
+# `xrandr --listmonitors` row: index, name, w/mmw x h/mmh + x + y.
+# Never matches the leading "Monitors: N" line.
+_LISTMON_RE = re.compile(
+    r'^[ \t]*\d+:[ \t]+[+*]*(\S+)[ \t]+(\d+)/(\d+)x(\d+)/(\d+)\+(\d+)\+(\d+)', re.M)
+
 
 class XRandRLoadMixin:
 
-    def load_from_x(self):
+    def load_from_x(self, probe=False):
+        # probe=True makes xrandr re-poll the outputs (slow, ~1-2s) for
+        # an explicit "detect displays"; otherwise --current reports the
+        # configuration the X server already knows.
+        #
         # Preserve borders, output-level primary, and per-leaf primary
         # across reloads — none of these are reliably discoverable from
         # the X server state alone:
@@ -57,99 +85,113 @@ class XRandRLoadMixin:
         self._pending_leaf_primary = old_leaf_primary
         self.state = self.State()
 
-        screenline, items = self._load_raw_lines()
+        # --verbose and --listmonitors (read by _load_monitors) are
+        # independent; run them side by side instead of back to back.
+        if probe:
+            invalidate_query_cache()
+        verbose_args = ("--verbose",) if probe else ("--current", "--verbose")
+        self._prefetch_queries(verbose_args, ("--listmonitors",))
 
-        self._load_parse_screenline(screenline)
+        try:
+            screenline, items = self._load_raw_lines(verbose_args)
 
-        for item in items:
-            headline = item[0]
-            details = item[1]
-            edid_hex = item[2] if len(item) > 2 else ""
-            if headline.startswith("  "):
-                continue
-            if headline == "":
-                continue
+            self._load_parse_screenline(screenline)
+
+            for item in items:
+                headline = item[0]
+                details = item[1]
+                edid_hex = item[2] if len(item) > 2 else ""
+                if headline.startswith("  "):
+                    continue
+                if headline == "":
+                    continue
 
-            headline = headline.replace(
-                'unknown connection', 'unknown-connection')
-            hsplit = headline.split(" ")
-            output = self.state.Output(hsplit[0])
-            assert hsplit[1] in (
-                "connected", "disconnected", 'unknown-connection')
+                headline = headline.replace(
+                    'unknown connection', 'unknown-connection')
+                hsplit = headline.split(" ")
+                output = self.state.Output(hsplit[0])
+                assert hsplit[1] in _CONNECTION_STATES
 
-            output.connected = (hsplit[1] in ('connected', 'unknown-connection'))
-            output.edid_hex = edid_hex
+                output.connected = (hsplit[1] in _CONNECTED_STATES)
+                output.edid_hex = edid_hex
 
-            # Parse physical dimensions (e.g. "1210mm x 680mm")
-            mm_match = re.search(r'(\d+)mm\s+x\s+(\d+)mm', headline)
-            if mm_match:
-                output.physical_w_mm = int(mm_match.group(1))
-                output.physical_h_mm = int(mm_match.group(2))
+                # Parse physical dimensions (e.g. "1210mm x 680mm")
+                mm_match = _MM_RE.search(headline)
+                if mm_match:
+                    output.physical_w_mm = int(mm_match.group(1))
+                    output.physical_h_mm = int(mm_match.group(2))
 
-            primary = False
-            if 'primary' in hsplit:
-                if Feature.PRIMARY in self.features:
-                    primary = True
-                hsplit.remove('primary')
+                # Whole headline words, with the supported-rotation list
+                # "(normal left inverted right x axis y axis)" unwrapped.
+                head_words = set(headline.replace('(', ' ').replace(')', ' ').split())
 
-            if not hsplit[2].startswith("("):
-                active = True
+                primary = False
+                if 'primary' in head_words:
+                    if Feature.PRIMARY in self.features:
+                        primary = True
+                    hsplit.remove('primary')
 
-                geometry = Geometry(hsplit[2])
+                if not hsplit[2].startswith("("):
+                    active = True
 
-                if hsplit[4] in ROTATIONS:
-                    current_rotation = Rotation(hsplit[4])
+                    geometry = Geometry(hsplit[2])
+
+                    if hsplit[4] in _ROTATION_NAMES:
+                        current_rotation = Rotation(hsplit[4])
+                    else:
+                        current_rotation = NORMAL
                 else:
-                    current_rotation = NORMAL
-            else:
-                active = False
-                geometry = None
-                current_rotation = None
-
-            output.rotations = set()
-            for rotation in ROTATIONS:
-                if rotation in headline:
-                    output.rotations.add(rotation)
-
-            currentname = None
-            current_rate = None
-            for tokens, w, h, refresh_rate in details:
-                name, _mode_raw = tokens[0:2]
-                mode_id = _mode_raw.strip("()")
-                try:
-                    size = Size([int(w), int(h)])
-                except ValueError:
-                    raise Exception(
-                        "Output %s parse error: modename %s modeid %s." % (output.name, name, mode_id)
-                    )
-                if "*current" in tokens:
-                    currentname = name
-                    current_rate = refresh_rate
-                if "+preferred" in tokens and output.preferred_resolution is None:
-                    output.preferred_resolution = (int(w), int(h))
-                for x in ["+preferred", "*current"]:
-                    if x in tokens:
-                        tokens.remove(x)
-
-                for old_mode in output.modes:
-                    if old_mode.name == name and old_mode.refresh_rate == refresh_rate:
+                    active = False
+                    geometry = None
+                    current_rotation = None
+
+                output.rotations = {r for r in ROTATIONS if r in head_words}
+
+                currentname = None
+                current_rate = None
+                seen_modes = {}  # (name, refresh_rate) -> NamedSize
+                for tokens, w, h, refresh_rate in details:
+                    name, _mode_raw = tokens[0:2]
+                    mode_id = _mode_raw.strip("()")
+                    try:
+                        size = Size([int(w), int(h)])
+                    except ValueError:
+                        raise Exception(
+                            "Output %s parse error: modename %s modeid %s." % (output.name, name, mode_id)
+                        )
+                    if "*current" in tokens:
+                        currentname = name
+                        current_rate = refresh_rate
+                    if "+preferred" in tokens and output.preferred_resolution is None:
+                        output.preferred_resolution = (int(w), int(h))
+                    for x in ["+preferred", "*current"]:
+                        if x in tokens:
+                            tokens.remove(x)
+
+                    old_mode = seen_modes.get((name, refresh_rate))
+                    if old_mode is not None:
                         if tuple(old_mode) != tuple(size):
                             warnings.warn((
                                 "Supressing duplicate mode %s even "
                                 "though it has different resolutions (%s, %s)."
                             ) % (name, size, old_mode))
-                        break
-                else:
-                    output.modes.append(NamedSize(size, name=name, refresh_rate=refresh_rate))
+                    else:
+                        mode = NamedSize(size, name=name, refresh_rate=refresh_rate)
+                        seen_modes[name, refresh_rate] = mode
+                        output.modes.append(mode)
 
-            self.state.outputs[output.name] = output
-            self.configuration.outputs[output.name] = self.configuration.OutputConfiguration(
-                active, primary, geometry, current_rotation, currentname, current_rate
-            )
+                self.state.outputs[output.name] = output
+                self.configuration.outputs[output.name] = self.configuration.OutputConfiguration(
+                    active, primary, geometry, current_rotation, currentname, current_rate
+                )
 
-        # Load existing virtual monitors from X and merge virtual outputs
-        # (DP-5~0, ~1, ~2) back into their physical parent (DP-5).
-        self._load_monitors()
+            # Load existing virtual monitors from X and merge virtual outputs
+            # (DP-5~0, ~1, ~2) back into their physical parent (DP-5).
+            self._load_monitors()
+        finally:
+            # Reap anything a parse error left unread, so its output
+            # can't be picked up by a later load as if it were fresh.
+            self._discard_inflight_queries()
 
         # Restore output-level primary (preserved across reload). The
         # X server may not report any primary at all on Nvidia tiled
@@ -221,25 +263,15 @@ class XRandRLoadMixin:
         physical_geom = {}  # name -> (w, h, x, y, w_mm, h_mm)
         vm_regions = {}     # base_name -> [(x, y, w, h), ...]
         try:
-            listmon = self._output("--listmonitors")
-            for line in listmon.strip().split('\n'):
-                line = line.strip()
-                if line.startswith('Monitors:'):
-                    continue
-                m = re.match(
-                    r'\d+:\s+[+*]*(\S+)\s+(\d+)/(\d+)x(\d+)/(\d+)\+(\d+)\+(\d+)',
-                    line
-                )
-                if not m:
-                    continue
-                mon_name = m.group(1)
-                w, w_mm, h, h_mm, x, y = [int(m.group(i)) for i in range(2, 8)]
-                if '~' not in mon_name:
+            listmon = self._output_cached("--listmonitors")
+            for mon_name, *geom in _LISTMON_RE.findall(listmon):
+                w, w_mm, h, h_mm, x, y = map(int, geom)
+                base, sep, suffix = mon_name.rpartition('~')
+                if not sep:
                     physical_geom[mon_name] = (w, h, x, y, w_mm, h_mm)
                 else:
-                    base = mon_name.rsplit('~', 1)[0]
                     try:
-                        int(mon_name.rsplit('~', 1)[1])
+                        int(suffix)
                     except ValueError:
                         continue
                     if base not in vm_regions:
@@ -253,11 +285,11 @@ class XRandRLoadMixin:
         # virtual outputs (--listmonitors can be missing some).
         virt_groups = {}  # base_name -> [virt_name, ...]
         for name in list(self.configuration.outputs.keys()):
-            if '~' not in name:
+            base, sep, suffix = name.rpartition('~')
+            if not sep:
                 continue
-            base = name.rsplit('~', 1)[0]
             try:
-                int(name.rsplit('~', 1)[1])
+                int(suffix)
             except ValueError:
                 continue
             if base not in virt_groups:
@@ -333,7 +365,7 @@ class XRandRLoadMixin:
             phys_state.connected = True
             phys_state.modes = list(virt_state.modes)
             # Ensure the physical resolution is available as a mode
-            if not any(m.name == phys_mode.name for m in phys_state.modes):
+            if phys_mode.name not in {m.name for m in virt_state.modes}:
                 phys_state.modes.append(phys_mode)
             phys_state.rotations = virt_state.rotations
             phys_state.edid_hex = virt_state.edid_hex
@@ -395,75 +427,42 @@ class XRandRLoadMixin:
             if not tree.is_leaf:
                 self.configuration.splits[base_name] = tree
 
-    def _load_raw_lines(self):
-        output = self._output("--verbose")
+    def _load_raw_lines(self, verbose_args=("--current", "--verbose")):
+        output = self._output_cached(*verbose_args)
         items = []
         screenline = None
-        in_edid = False
-        edid_lines = []
-        current_edid_item = None
-        for line in output.split('\n'):
-            if line.startswith("Screen "):
+        for m in _VERBOSE_LINE_RE.finditer(output):
+            kind = m.lastgroup
+            if kind == 'screen':
                 assert screenline is None
-                screenline = line
-            elif line.startswith('\t'):
-                # Check for EDID property start
-                stripped = line.strip()
-                if stripped == 'EDID:':
-                    in_edid = True
-                    edid_lines = []
-                    current_edid_item = items[-1] if items else None
-                    continue
-                if in_edid:
-                    if re.match(r'^[0-9a-f]+$', stripped):
-                        edid_lines.append(stripped)
-                        continue
-                    else:
-                        # EDID block ended, store it
-                        if current_edid_item is not None and edid_lines:
-                            edid_hex = ''.join(edid_lines)
-                            if len(current_edid_item) < 3:
-                                current_edid_item.append(edid_hex)
-                            else:
-                                current_edid_item[2] = edid_hex
-                        in_edid = False
-                        edid_lines = []
-                        current_edid_item = None
-                continue
-            elif line.startswith(2 * ' '):
-                line = line.strip()
-                if reduce(bool.__or__, [line.startswith(x + ':') for x in "hv"]):
-                    is_vline = line.startswith('v:')
-                    refresh_rate = None
-                    if is_vline:
-                        rate_match = re.search(r'clock\s+([\d.]+)\s*Hz', line)
-                        if rate_match:
-                            refresh_rate = float(rate_match.group(1))
-                    line = line[-len(line):line.index(" start") - len(line)]
-                    items[-1][1][-1].append(line[line.rindex(' '):])
-                    if is_vline:
-                        items[-1][1][-1].append(refresh_rate)
-                else:
-                    items[-1][1].append([line.split()])
-            else:
-                # Flush any pending EDID before starting new output
-                if in_edid and current_edid_item is not None and edid_lines:
-                    edid_hex = ''.join(edid_lines)
-                    if len(current_edid_item) < 3:
-                        current_edid_item.append(edid_hex)
+                screenline = m.group(kind)
+            elif kind == 'edid':
+                edid_hex = ''.join(m.group(kind).split())
+                if items and edid_hex:
+                    item = items[-1]
+                    if len(item) < 3:
+                        item.append(edid_hex)
                     else:
-                        current_edid_item[2] = edid_hex
-                    in_edid = False
-                    edid_lines = []
-                    current_edid_item = None
-                items.append([line, []])
-        # Flush any remaining EDID at end of output
-        if in_edid and current_edid_item is not None and edid_lines:
-            edid_hex = ''.join(edid_lines)
-            if len(current_edid_item) < 3:
-                current_edid_item.append(edid_hex)
+                        item[2] = edid_hex
+            elif kind == 'prop':
+                pass  # no other output property is used
+            elif kind == 'hv':
+                line = m.group(kind).rstrip()
+                is_vline = line.startswith('v:')
+                refresh_rate = None
+                if is_vline:
+                    rate_match = _RATE_RE.search(line)
+                    if rate_match:
+                        refresh_rate = float(rate_match.group(1))
+                end = line.index(" start")
+                space = line.rindex(' ', 0, end)
+                items[-1][1][-1].append(line[space:end])
+                if is_vline:
+                    items[-1][1][-1].append(refresh_rate)
+            elif kind == 'mode':
+                items[-1][1].append([m.group(kind).split()])
             else:
-                current_edid_item[2] = edid_hex
+                items.append([m.group(kind), []])
         return screenline, items
 
     def _load_parse_screenline(self, screenline):
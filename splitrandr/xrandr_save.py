@@ -21,9 +21,12 @@ from .auxiliary import InadequateConfiguration
 from .splits import SplitTree
 from .i18n import _
 from . import compositor
+from .xrandr_invoke import invalidate_query_cache
 
 log = logging.getLogger('splitrandr')
 
+_LISTMON_NAME_RE = re.compile(r'\s*\d+:\s+[+*]*(\S+)')
+
 
 def _restart_sn_watcher():
     """Restart xapp-sn-watcher so it picks up the new monitor layout.
@@ -35,12 +38,13 @@ def _restart_sn_watcher():
     """
     import subprocess
     try:
-        result = subprocess.run(
+        # Fire-and-forget: pkill is idempotent and nothing after it
+        # depends on the result, so the apply doesn't wait for it.
+        subprocess.Popen(
             ['pkill', '-x', 'xapp-sn-watcher'],
-            capture_output=True, timeout=5
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
         )
-        if result.returncode == 0:
-            log.info("restarted xapp-sn-watcher for monitor layout update")
+        log.info("requested xapp-sn-watcher restart for monitor layout update")
     except Exception:
         pass
 
@@ -48,20 +52,22 @@ def _restart_sn_watcher():
 class XRandRSaveMixin:
 
     def save_to_shellscript_string(self):
-        template = '#!/bin/sh\n%(pre_commands)s\n%(clear_fakexrandr)s\n%(xrandr)s\n%(cinnamon_safe_setmonitors)s\n'
-
-        # Build delmonitor + setmonitor commands
-        del_lines = []
-        set_lines = []
-        for output_name, tree in self.configuration.splits.items():
-            output_cfg = self.configuration.outputs.get(output_name)
+        # Build delmonitor + setmonitor arguments
+        del_args = []
+        set_args = []
+        outputs = self.configuration.outputs
+        states = self.state.outputs
+        splits = self.configuration.splits
+        borders = self.configuration.borders
+        for output_name, tree in splits.items():
+            output_cfg = outputs.get(output_name)
             if not output_cfg or not output_cfg.active:
                 continue
 
-            output_state = self.state.outputs.get(output_name)
+            output_state = states.get(output_name)
             w_mm = output_state.physical_w_mm if output_state else 0
             h_mm = output_state.physical_h_mm if output_state else 0
-            border = self.configuration.borders.get(output_name, 0)
+            border = borders.get(output_name, 0)
             commands = tree.to_setmonitor_commands(
                 output_name,
                 output_cfg.size[0], output_cfg.size[1],
@@ -69,17 +75,17 @@ class XRandRSaveMixin:
                 w_mm, h_mm, border
             )
             for mon_name, geom, out in commands:
-                del_lines.append("env -u LD_PRELOAD xrandr --delmonitor %s 2>/dev/null || true" % shlex.quote(mon_name))
-                set_lines.append("env -u LD_PRELOAD xrandr --setmonitor %s %s %s" % (shlex.quote(mon_name), shlex.quote(geom), shlex.quote(out)))
+                del_args.append("--delmonitor %s" % shlex.quote(mon_name))
+                set_args.append("--setmonitor %s %s %s" % (shlex.quote(mon_name), shlex.quote(geom), shlex.quote(out)))
 
         # Generate setmonitor for unsplit outputs that have a border
-        for output_name, border_val in self.configuration.borders.items():
-            if border_val <= 0 or output_name in self.configuration.splits:
+        for output_name, border_val in borders.items():
+            if border_val <= 0 or output_name in splits:
                 continue
-            output_cfg = self.configuration.outputs.get(output_name)
+            output_cfg = outputs.get(output_name)
             if not output_cfg or not output_cfg.active:
                 continue
-            output_state = self.state.outputs.get(output_name)
+            output_state = states.get(output_name)
             w_mm = output_state.physical_w_mm if output_state else 0
             h_mm = output_state.physical_h_mm if output_state else 0
             w, h = output_cfg.size
@@ -88,28 +94,27 @@ class XRandRSaveMixin:
             bh = max(h - 2 * border_val, 1)
             mon_name = "%s~0" % output_name
             geom = "%d/%dx%d/%d+%d+%d" % (bw, w_mm, bh, h_mm, ox + border_val, oy + border_val)
-            del_lines.append("env -u LD_PRELOAD xrandr --delmonitor %s 2>/dev/null || true" % shlex.quote(mon_name))
-            set_lines.append("env -u LD_PRELOAD xrandr --setmonitor %s %s %s" % (shlex.quote(mon_name), shlex.quote(geom), shlex.quote(output_name)))
+            del_args.append("--delmonitor %s" % shlex.quote(mon_name))
+            set_args.append("--setmonitor %s %s %s" % (shlex.quote(mon_name), shlex.quote(geom), shlex.quote(output_name)))
 
-        # Generate border comments for persistence
-        border_comments = []
-        for output_name, border_val in self.configuration.borders.items():
-            if border_val > 0:
-                border_comments.append(
-                    '# splitrandr-border:%s=%d' % (output_name, border_val))
+        lines = ['#!/bin/sh']
+        # User pre-commands may span lines; drop blank ones.
+        for cmd in getattr(self.configuration, '_pre_commands', []):
+            lines.extend(line for line in cmd.split('\n') if line.strip())
+        # Clear fakexrandr config so xrandr sees real physical outputs
+        lines.append('rm -f "${XDG_CONFIG_HOME:-$HOME/.config}/fakexrandr.bin"')
+        lines.append("xrandr " + " ".join(shlex.quote(a) for a in self.configuration.commandlineargs()))
 
         # Generate a compositor-safe wrapper for setmonitor commands. On
         # affected Cinnamon (Muffin >= 5.4.0 segfaults on setmonitor events)
         # we SIGSTOP the shell and silence the settings-daemon xrandr plugin
         # across the calls. GNOME/Mutter needs neither, so the freeze and the
         # (Cinnamon-only) xapp-sn-watcher restart are omitted there.
-        if del_lines or set_lines:
-            monitor_cmds = '\n'.join(del_lines + set_lines)
+        if set_args:
             comp = compositor.current()
-            border_block = ('\n'.join(border_comments) + '\n'
-                            if border_comments else '')
-            if comp.needs_setmonitor_sigstop_guard:
-                freeze = (
+            guard = comp.needs_setmonitor_sigstop_guard
+            if guard:
+                lines.append((
                     '# Compositor safety: freeze the shell during setmonitor calls\n'
                     'SHELL_PID=$(pgrep -x %(shell)s 2>/dev/null)\n'
                     'if [ -n "$SHELL_PID" ]; then\n'
@@ -121,49 +126,40 @@ class XRandRSaveMixin:
                     '    sleep 0.05; _i=$((_i+1))\n'
                     '  done\n'
                     '  kill -STOP "$SHELL_PID" 2>/dev/null\n'
-                    'fi\n'
-                ) % {'shell': comp.shell_process, 'csd': comp.csd_xrandr_schema}
-                thaw = (
+                    'fi'
+                ) % {'shell': comp.shell_process, 'csd': comp.csd_xrandr_schema})
+            # One xrandr per batch instead of two per monitor. A delete
+            # of a monitor that doesn't exist yet may fail the whole
+            # batch; that's harmless, as --setmonitor replaces any
+            # monitor of the same name anyway. If the setmonitor batch
+            # fails, fall back to one call each so a single bad monitor
+            # doesn't drop the rest (as _run_batch_ignore_error does).
+            sep = ' \\\n  '
+            lines.append('( env -u LD_PRELOAD xrandr' + sep + sep.join(del_args)
+                         + ' 2>/dev/null || true )')
+            lines.append('env -u LD_PRELOAD xrandr' + sep + sep.join(set_args)
+                         + ' || {\n'
+                         + ''.join('  env -u LD_PRELOAD xrandr %s\n' % arg
+                                   for arg in set_args)
+                         + '}')
+            # Border comments for persistence
+            for output_name, border_val in borders.items():
+                if border_val > 0:
+                    lines.append('# splitrandr-border:%s=%d' % (output_name, border_val))
+            if guard:
+                lines.append(
                     'if [ -n "$SHELL_PID" ]; then\n'
                     '  # X server round-trip to flush pending RandR events\n'
                     '  xrandr --listmonitors >/dev/null 2>&1\n'
                     '  kill -CONT "$SHELL_PID" 2>/dev/null\n'
                     'fi\n'
                     '# Restart xapp-sn-watcher so AppIndicator3 menus use new layout\n'
-                    'pkill -x xapp-sn-watcher 2>/dev/null || true\n'
+                    'pkill -x xapp-sn-watcher 2>/dev/null || true'
                 )
-            else:
-                freeze = ''
-                thaw = ''
-            cinnamon_safe = (
-                freeze
-                + monitor_cmds + '\n'
-                + border_block
-                + thaw
-                + '# Write fakexrandr.bin and monitors.xml to match\n'
-                'python3 -m splitrandr --update-configs 2>/dev/null || true'
-            )
-        else:
-            cinnamon_safe = ''
-
-        # Clear fakexrandr config so xrandr sees real physical outputs
-        clear_fakexrandr = (
-            'rm -f "${XDG_CONFIG_HOME:-$HOME/.config}/fakexrandr.bin"'
-        )
+            lines.append('# Write fakexrandr.bin and monitors.xml to match')
+            lines.append('python3 -m splitrandr --update-configs 2>/dev/null || true')
 
-        pre_cmds = getattr(self.configuration, '_pre_commands', [])
-        data = {
-            'pre_commands': '\n'.join(pre_cmds) if pre_cmds else '',
-            'clear_fakexrandr': clear_fakexrandr,
-            'xrandr': "xrandr " + " ".join(shlex.quote(a) for a in self.configuration.commandlineargs()),
-            'delmonitors': '\n'.join(del_lines),
-            'setmonitors': '\n'.join(set_lines),
-            'cinnamon_safe_setmonitors': cinnamon_safe,
-        }
-        result = template % data
-        # Clean up empty lines from unused template markers
-        result = '\n'.join(line for line in result.split('\n') if line.strip() != '') + '\n'
-        return result
+        return '\n'.join(lines) + '\n'
 
     def _log_tree(self, name, tree, indent="  "):
         if tree.is_leaf:
@@ -175,6 +171,10 @@ class XRandRSaveMixin:
 
     def save_to_x(self):
         self.check_configuration()
+        # Applying also goes through Cinnamon (DBus, restarts), not only
+        # _run(); neither this apply nor the reload after it may see a
+        # query cached before or during it.
+        invalidate_query_cache()
 
         log.info("=== save_to_x: starting ===")
         log.info("splits to apply: %s", list(self.configuration.splits.keys()))
@@ -215,119 +215,23 @@ class XRandRSaveMixin:
             # loads the .so and the rm is unnecessary; the bin can stay
             # in place throughout the apply.
 
-            # Apply main configuration (before any setmonitor calls)
+            # Apply main configuration (before any setmonitor calls).
+            # The configuration doesn't change during save_to_x, so the
+            # same args serve every re-apply below.
             log.info("applying main xrandr config")
-            self._run(*self.configuration.commandlineargs())
+            cli_args = tuple(self.configuration.commandlineargs())
+            self._run(*cli_args)
 
             # The nvidia driver processes output changes asynchronously.
             # After the xrandr command returns, outputs may still be at
             # their old positions.  Wait briefly and re-apply if needed.
-            self._verify_and_correct_positions(max_attempts=3, delay=0.5)
+            self._verify_and_correct_positions(max_attempts=3, delay=0.5, cli_args=cli_args)
 
             # Refresh EDIDs from --verbose (always runs unhooked now,
             # so real EDIDs are visible regardless of fakexrandr state).
             self._refresh_edids()
 
-            # Delete ALL existing virtual monitors (anything with ~ in the name)
-            try:
-                listmon_output = self._output("--listmonitors")
-                log.info("current monitors:\n%s", listmon_output.strip())
-                for line in listmon_output.strip().split('\n'):
-                    line = line.strip()
-                    if line.startswith('Monitors:'):
-                        continue
-                    m = re.match(r'\d+:\s+[+*]*(\S+)', line)
-                    if m:
-                        mon_name = m.group(1)
-                        if '~' in mon_name:
-                            log.info("deleting virtual monitor: %s", mon_name)
-                            self._run_no_preload_ignore_error("--delmonitor", mon_name)
-            except Exception as e:
-                log.warning("listmonitors failed: %s", e)
-
-            # Register `xrandr --setmonitor` virtual monitors for each
-            # leaf so Cinnamon — which no longer runs with LD_PRELOAD
-            # (see end of save_to_x for rationale) — can see the splits
-            # via the X server's RandR 1.5 monitor list.  Cinnamon's
-            # XRRGetMonitors call returns automatic monitors for each
-            # parent output PLUS the setmonitor entries we register
-            # here, and Mutter builds one MetaMonitor per entry.
-            #
-            # Cinnamon must be SIGSTOPped (CinnamonSetMonitorGuard
-            # above) for the duration of these calls — Muffin >= 5.4.0
-            # segfaults on the inbound RandR notifications when it
-            # receives them while live.  The Guard freezes Cinnamon,
-            # we register the monitors, the Guard resumes Cinnamon
-            # which then processes the queued events as a single batch.
-            for output_name, tree in self.configuration.splits.items():
-                if tree.is_leaf:
-                    continue
-                out_cfg = self.configuration.outputs.get(output_name)
-                if not out_cfg or not out_cfg.active:
-                    continue
-                w, h = out_cfg.size
-                x, y = out_cfg.position
-                state = self.state.outputs.get(output_name)
-                w_mm = state.physical_w_mm if state else 0
-                h_mm = state.physical_h_mm if state else 0
-                border = self.configuration.borders.get(output_name, 0)
-                commands = tree.to_setmonitor_commands(
-                    output_name, w, h, x, y, w_mm, h_mm, border=border,
-                )
-                for mon_name, geom, owner in commands:
-                    log.info("registering setmonitor: %s %s %s",
-                             mon_name, geom, owner)
-                    self._run_no_preload_ignore_error(
-                        "--setmonitor", mon_name, geom, owner,
-                    )
-
-            # Borders on un-split outputs: register a single setmonitor
-            # for the inset region so the dead-zone is actually enforced.
-            for output_name, border in self.configuration.borders.items():
-                if border <= 0:
-                    continue
-                tree = self.configuration.splits.get(output_name)
-                if tree and not tree.is_leaf:
-                    continue  # split case handled above (border applies per-leaf)
-                out_cfg = self.configuration.outputs.get(output_name)
-                if not out_cfg or not out_cfg.active:
-                    continue
-                w, h = out_cfg.size
-                x, y = out_cfg.position
-                state = self.state.outputs.get(output_name)
-                w_mm = state.physical_w_mm if state else 0
-                h_mm = state.physical_h_mm if state else 0
-                rx = x + border
-                ry = y + border
-                rw = max(w - 2 * border, 1)
-                rh = max(h - 2 * border, 1)
-                rmm_w = max(w_mm - 2 * border * w_mm // w, 1) if w_mm else 0
-                rmm_h = max(h_mm - 2 * border * h_mm // h, 1) if h_mm else 0
-                geom = "%d/%dx%d/%d+%d+%d" % (rw, rmm_w, rh, rmm_h, rx, ry)
-                mon_name = "%s~border" % output_name
-                self._run_no_preload_ignore_error(
-                    "--setmonitor", mon_name, geom, output_name,
-                )
-
-            # Write fakexrandr config and monitors.xml BEFORE Cinnamon
-            # resumes, so it reads the new config when it processes the
-            # queued RandR events.
-            try:
-                from .fakexrandr_config import write_fakexrandr_config
-                write_fakexrandr_config(
-                    self.configuration.splits, self.state, self.configuration,
-                    self.configuration.borders
-                )
-            except Exception as e:
-                log.warning("fakexrandr config write failed: %s", e)
-            try:
-                from .fakexrandr_config import write_cinnamon_monitors_xml
-                write_cinnamon_monitors_xml(
-                    self.configuration.splits, self.state, self.configuration,
-                    self.configuration.borders
-                )
-            except Exception as e:
-                log.warning("monitors.xml write failed: %s", e)
+            self._apply_virtual_monitors()
 
         # Verify result
         try:
@@ -464,41 +368,14 @@ class XRandRSaveMixin:
                 # for all xrandr invocations, and rm'ing the bin would expose
                 # an unfrozen Cinnamon to a "no config" window during the
                 # Guard's PID race.
-                self._run(*self.configuration.commandlineargs())
-                self._verify_and_correct_positions(max_attempts=3, delay=0.5)
+                self._run(*cli_args)
+                self._verify_and_correct_positions(max_attempts=3, delay=0.5, cli_args=cli_args)
 
                 # Re-create setmonitor VMs
-                try:
-                    listmon_output = self._output("--listmonitors")
-                    for line in listmon_output.strip().split('\n'):
-                        line = line.strip()
-                        if line.startswith('Monitors:'):
-                            continue
-                        m_mon = re.match(r'\d+:\s+[+*]*(\S+)', line)
-                        if m_mon and '~' in m_mon.group(1):
-                            self._run_no_preload_ignore_error("--delmonitor", m_mon.group(1))
-                except Exception:
-                    pass
-
                 # NOTE: setmonitor creation intentionally elided —
-                # see the comment in the initial-apply block above.
-
-                try:
-                    from .fakexrandr_config import write_fakexrandr_config
-                    write_fakexrandr_config(
-                        self.configuration.splits, self.state, self.configuration,
-                        self.configuration.borders
-                    )
-                except Exception:
-                    pass
-                try:
-                    from .fakexrandr_config import write_cinnamon_monitors_xml
-                    write_cinnamon_monitors_xml(
-                        self.configuration.splits, self.state, self.configuration,
-                        self.configuration.borders
-                    )
-                except Exception:
-                    pass
+                # only the stale VMs are deleted before the configs
+                # are rewritten.
+                self._apply_virtual_monitors(register=False)
             log.info("final correction applied")
 
         # Restart xapp-sn-watcher so it picks up the new monitor layout.
@@ -546,8 +423,120 @@ class XRandRSaveMixin:
         from .fakexrandr_config import nudge_gtk_monitor_refresh
         nudge_gtk_monitor_refresh()
 
+        invalidate_query_cache()
         log.info("=== save_to_x: done ===")
 
+    def _apply_virtual_monitors(self, register=True):
+        """Replace the X server's virtual monitors with the configured
+        ones and write fakexrandr.bin / monitors.xml to match.
+
+        Must run inside CinnamonSetMonitorGuard. With register=False the
+        old virtual monitors are only deleted, not re-created.
+        """
+        # Delete ALL existing virtual monitors (anything with ~ in the name)
+        deletes = []
+        try:
+            listmon_output = self._output("--listmonitors")
+            log.info("current monitors:\n%s", listmon_output.strip())
+            for line in listmon_output.splitlines():
+                m = _LISTMON_NAME_RE.match(line)
+                if m:
+                    mon_name = m.group(1)
+                    if '~' in mon_name:
+                        log.info("deleting virtual monitor: %s", mon_name)
+                        deletes.append(("--delmonitor", mon_name))
+        except Exception as e:
+            log.warning("listmonitors failed: %s", e)
+        self._run_batch_ignore_error(deletes)
+
+        if register:
+            registers = []
+            # Register `xrandr --setmonitor` virtual monitors for each
+            # leaf so Cinnamon — which no longer runs with LD_PRELOAD
+            # (see end of save_to_x for rationale) — can see the splits
+            # via the X server's RandR 1.5 monitor list.  Cinnamon's
+            # XRRGetMonitors call returns automatic monitors for each
+            # parent output PLUS the setmonitor entries we register
+            # here, and Mutter builds one MetaMonitor per entry.
+            #
+            # Cinnamon must be SIGSTOPped (CinnamonSetMonitorGuard
+            # in save_to_x) for the duration of these calls — Muffin >= 5.4.0
+            # segfaults on the inbound RandR notifications when it
+            # receives them while live.  The Guard freezes Cinnamon,
+            # we register the monitors, the Guard resumes Cinnamon
+            # which then processes the queued events as a single batch.
+            for output_name, tree in self.configuration.splits.items():
+                if tree.is_leaf:
+                    continue
+                out_cfg = self.configuration.outputs.get(output_name)
+                if not out_cfg or not out_cfg.active:
+                    continue
+                w, h = out_cfg.size
+                x, y = out_cfg.position
+                state = self.state.outputs.get(output_name)
+                w_mm = state.physical_w_mm if state else 0
+                h_mm = state.physical_h_mm if state else 0
+                border = self.configuration.borders.get(output_name, 0)
+                commands = tree.to_setmonitor_commands(
+                    output_name, w, h, x, y, w_mm, h_mm, border=border,
+                )
+                for mon_name, geom, owner in commands:
+                    log.info("registering setmonitor: %s %s %s",
+                             mon_name, geom, owner)
+                    registers.append(("--setmonitor", mon_name, geom, owner))
+
+            # Borders on un-split outputs: register a single setmonitor
+            # for the inset region so the dead-zone is actually enforced.
+            for output_name, border in self.configuration.borders.items():
+                if border <= 0:
+                    continue
+                tree = self.configuration.splits.get(output_name)
+                if tree and not tree.is_leaf:
+                    continue  # split case handled above (border applies per-leaf)
+                out_cfg = self.configuration.outputs.get(output_name)
+                if not out_cfg or not out_cfg.active:
+                    continue
+                w, h = out_cfg.size
+                x, y = out_cfg.position
+                state = self.state.outputs.get(output_name)
+                w_mm = state.physical_w_mm if state else 0
+                h_mm = state.physical_h_mm if state else 0
+                rx = x + border
+                ry = y + border
+                rw = max(w - 2 * border, 1)
+                rh = max(h - 2 * border, 1)
+                rmm_w = max(w_mm - 2 * border * w_mm // w, 1) if w_mm else 0
+                rmm_h = max(h_mm - 2 * border * h_mm // h, 1) if h_mm else 0
+                geom = "%d/%dx%d/%d+%d+%d" % (rw, rmm_w, rh, rmm_h, rx, ry)
+                mon_name = "%s~border" % output_name
+                registers.append(("--setmonitor", mon_name, geom, output_name))
+
+            self._run_batch_ignore_error(registers)
+
+        # Write fakexrandr config and monitors.xml BEFORE Cinnamon
+        # resumes, so it reads the new config when it processes the
+        # queued RandR events. The two writers only read the
+        # configuration and target different files; run them side by
+        # side so the bin write overlaps monitors.xml's own
+        # `xrandr --verbose` round trip.
+        from concurrent.futures import ThreadPoolExecutor
+        from .fakexrandr_config import (
+            write_fakexrandr_config, write_cinnamon_monitors_xml,
+        )
+        writer_args = (self.configuration.splits, self.state,
+                       self.configuration, self.configuration.borders)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            fxr_job = pool.submit(write_fakexrandr_config, *writer_args)
+            xml_job = pool.submit(write_cinnamon_monitors_xml, *writer_args)
+        try:
+            fxr_job.result()
+        except Exception as e:
+            log.warning("fakexrandr config write failed: %s", e)
+        try:
+            xml_job.result()
+        except Exception as e:
+            log.warning("monitors.xml write failed: %s", e)
+
     def save_to_json(self, path):
         data = self.configuration.to_dict()
         os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -557,7 +546,9 @@ class XRandRSaveMixin:
 
     def load_from_json(self, path):
         with open(path, 'r') as f:
-            data = json.load(f)
+            self.load_from_dict(json.load(f))
+
+    def load_from_dict(self, data):
         # Merge saved config onto current live state
         saved_cfg = self.Configuration.from_dict(data, self)
         for name, saved_out in saved_cfg.outputs.items():